@@ -0,0 +1,168 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+
+import asyncpg
+
+from bot import Manager, config
+
+# The lookup used before level configs were read first, it writes the row even when it exists.
+UPSERT_QUERY = """
+    INSERT INTO levels (user_id, guild_id)
+    VALUES ($1, $2)
+    ON CONFLICT (user_id, guild_id) DO UPDATE
+    SET user_id = excluded.user_id, guild_id = excluded.guild_id
+    RETURNING *
+"""
+
+SCHEMA_QUERY = """
+    CREATE TABLE levels (
+        user_id BIGINT NOT NULL,
+        guild_id BIGINT NOT NULL,
+        PRIMARY KEY (user_id, guild_id),
+        messages INT DEFAULT 0,
+        experience INT DEFAULT 0
+    )
+"""
+
+GUILD_ID = 1
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    quantiles = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+    }
+
+
+async def populate(members: int, existing: float, seed: int) -> None:
+    """Recreates the levels table with a fraction of the members already having a row."""
+    rows = [(user_id, GUILD_ID, 1, random.Random(seed + user_id).randrange(10**5)) for user_id in range(members)]
+    rows = random.Random(seed).sample(rows, int(members * existing))
+
+    async with Manager.pool.acquire() as connection:
+        await connection.execute("DROP TABLE IF EXISTS levels")
+        await connection.execute(SCHEMA_QUERY)
+        await connection.copy_records_to_table("levels", records=rows)
+        await connection.execute("VACUUM ANALYZE levels")
+
+
+async def table_stats() -> dict[str, int]:
+    async with Manager.pool.acquire() as connection:
+        # Statistics are reported asynchronously, flushing them is only possible from PostgreSQL 15.
+        if connection.get_server_version().major >= 15:
+            await connection.execute("SELECT pg_stat_force_next_flush()")
+        else:
+            await asyncio.sleep(1)
+
+        await connection.execute("SELECT pg_stat_clear_snapshot()")
+        record = await connection.fetchrow(
+            "SELECT n_tup_ins, n_tup_upd, n_dead_tup FROM pg_stat_user_tables WHERE relid = 'levels'::regclass"
+        )
+        wal = await connection.fetchval("SELECT pg_current_wal_lsn() - '0/0'")
+
+    return {"inserted": record["n_tup_ins"], "updated": record["n_tup_upd"], "dead": record["n_dead_tup"], "wal": int(wal)}
+
+
+async def run(strategy: str, lookups: list[int]) -> list[float]:
+    samples = []
+
+    for user_id in lookups:
+        start = time.perf_counter()
+
+        if strategy == "upsert":
+            await Manager.pool.fetchrow(UPSERT_QUERY, user_id, GUILD_ID)
+        else:
+            await Manager.fetch_level_config(user_id, GUILD_ID, create=strategy == "read_first")
+
+        samples.append(time.perf_counter() - start)
+
+    return samples
+
+
+async def benchmark(args: argparse.Namespace) -> dict:
+    schema = f"benchmark_{os.getpid()}"
+
+    try:
+        connection = await asyncpg.connect(**config.DATABASE)
+    except Exception as exc:
+        raise SystemExit(f"Couldn't connect to the database in config.toml: {exc}")
+
+    # Created before the manager so that its migrations run inside the schema.
+    await connection.execute(f"CREATE SCHEMA {schema}")
+
+    lookups = [random.Random(args.seed + index).randrange(args.members) for index in range(args.lookups)]
+    results = {}
+
+    try:
+        settings = {"server_settings": {"search_path": schema}, "min_size": 1, "max_size": 1}
+        await Manager.init(**config.DATABASE, buffer={"flush_interval": 0}, pool=settings)
+
+        if not hasattr(Manager, "pool"):
+            raise SystemExit("Couldn't connect to the database in config.toml.")
+
+        for strategy in ("upsert", "read_first", "view_only"):
+            await populate(args.members, args.existing, args.seed)
+
+            before = await table_stats()
+            samples = await run(strategy, lookups)
+            after = await table_stats()
+
+            results[strategy] = {
+                **percentiles(samples),
+                "rows_inserted": after["inserted"] - before["inserted"],
+                "rows_updated": after["updated"] - before["updated"],
+                "dead_tuples": after["dead"],
+                "wal_bytes": after["wal"] - before["wal"],
+            }
+    finally:
+        await Manager.close()
+        await connection.execute(f"DROP SCHEMA {schema} CASCADE")
+        await connection.close()
+
+    return {"members": args.members, "existing": args.existing, "lookups": args.lookups, "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compares the writes and latency of looking up level configs with an upsert, reading first "
+        "and view only lookups, against the database in config.toml. Tables are created in a temporary schema "
+        "which is dropped afterwards. Run from the root of the repository."
+    )
+    parser.add_argument("--members", type=int, default=2000, help="The amount of members in the guild.")
+    parser.add_argument("--existing", type=float, default=0.8, help="The fraction of members which have a row.")
+    parser.add_argument("--lookups", type=int, default=5000, help="The amount of lookups per strategy.")
+    parser.add_argument("--seed", type=int, default=0, help="The seed of the members and lookups.")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(benchmark(args)), indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import time
+
+from PIL import Image
+
+from bot.plugins.leveling.render import get_dominant_color
+
+from .synthetic import create_avatar
+
+
+def get_palette_color(image: Image.Image, palette_size=16) -> tuple[int, int, int]:
+    """The previous implementation, kept here as the baseline."""
+    img = image.copy()
+    img.thumbnail((100, 100))
+
+    paletted = img.convert("P", palette=Image.ADAPTIVE, colors=palette_size)
+
+    palette = paletted.getpalette()
+    color_counts = sorted(paletted.getcolors(), reverse=True)
+    palette_index = color_counts[0][1]
+    dominant_color = palette[palette_index * 3 : palette_index * 3 + 3]  # type: ignore
+
+    return tuple(dominant_color)
+
+
+def measure(function, images: list[Image.Image]) -> tuple[float, list[tuple[int, int, int]]]:
+    start = time.perf_counter()
+    colors = [function(image) for image in images]
+    return (time.perf_counter() - start) / len(images), colors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compares the dominant colour extraction of the rank card against the previous adaptive palette "
+        "approach, for speed and for how closely the picked colours agree. Run from the root of the repository."
+    )
+    parser.add_argument("--avatars", type=int, default=200, help="The amount of synthetic avatars.")
+    parser.add_argument("--threshold", type=float, default=48, help="The distance under which colours agree.")
+    args = parser.parse_args()
+
+    transparent = [seed % 4 == 0 for seed in range(args.avatars)]
+    images = [
+        create_avatar(seed, transparent=transparent[seed]).resize((184, 184), Image.BOX) for seed in range(args.avatars)
+    ]
+
+    baseline, expected = measure(get_palette_color, images)
+    current, actual = measure(get_dominant_color, images)
+
+    distances = [math.dist(a, b) for a, b in zip(expected, actual)]
+    opaque = [distance for distance, value in zip(distances, transparent) if not value]
+
+    # The baseline counts the colour of transparent pixels, so only opaque avatars are expected to agree.
+    print(
+        json.dumps(
+            {
+                "avatars": len(images),
+                "baseline_ms": baseline * 1000,
+                "current_ms": current * 1000,
+                "speedup": baseline / current,
+                "mean_distance": sum(distances) / len(distances),
+                "agreement": sum(distance <= args.threshold for distance in distances) / len(distances),
+                "opaque_agreement": sum(distance <= args.threshold for distance in opaque) / len(opaque),
+            },
+            indent=4,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
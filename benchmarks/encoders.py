@@ -0,0 +1,71 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from bot.plugins.leveling.avatars import decode_avatar
+from bot.plugins.leveling.encoder import Encoder
+from bot.plugins.leveling.render import compose
+
+from .synthetic import create_avatar, encode
+
+MODES = {
+    "png-1": Encoder(format="png", compress_level=1),
+    "png-6": Encoder(format="png", compress_level=6),
+    "png-9": Encoder(format="png", compress_level=9),
+    "palette-256": Encoder(format="palette", colors=256, compress_level=6),
+    "palette-64": Encoder(format="palette", colors=64, compress_level=6),
+    "webp-90": Encoder(format="webp", quality=90),
+    "webp-75": Encoder(format="webp", quality=75),
+    "webp-lossless": Encoder(format="webp", lossless=True, quality=50),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Reports the encode time and size of rank cards for each encoder mode. "
+        "Run from the root of the repository."
+    )
+    parser.add_argument("--cards", type=int, default=20, help="The amount of synthetic cards encoded per mode.")
+    args = parser.parse_args()
+
+    cards = []
+    for seed in range(args.cards):
+        avatar, color = decode_avatar(encode(create_avatar(seed)))
+        cards.append(
+            compose(
+                avatar, color, f"Member {seed}", f"member#{seed:04}", seed, seed * 37, 1000, seed + 1, 10**5, seed**3
+            )
+        )
+
+    results = {}
+    for name, encoder in MODES.items():
+        start = time.perf_counter()
+        sizes = [len(encoder.encode(card)) for card in cards]
+        duration = time.perf_counter() - start
+
+        results[name] = {"encode_ms": duration / len(cards) * 1000, "bytes": sum(sizes) // len(sizes)}
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
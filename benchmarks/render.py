@@ -0,0 +1,170 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+
+import psutil
+import tomli
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from bot.plugins.leveling.avatars import decode_avatar
+from bot.plugins.leveling.pool import RenderPool
+from bot.plugins.leveling.render import cache_stats, render
+
+from .synthetic import create_animated_avatar, create_avatar, create_member, encode
+
+KINDS = ("opaque", "transparent", "animated")
+SIZES = (64, 128, 256, 1024)
+
+
+def create_avatars(count: int) -> list[tuple[str, int, bytes]]:
+    """Creates encoded avatars cycling through every kind and size."""
+    avatars = []
+
+    for seed in range(count):
+        kind, size = KINDS[seed % len(KINDS)], SIZES[(seed // len(KINDS)) % len(SIZES)]
+
+        if kind == "animated":
+            data = create_animated_avatar(seed, size)
+        else:
+            data = encode(create_avatar(seed, size, transparent=kind == "transparent"))
+
+        avatars.append((kind, size, data))
+
+    return avatars
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    quantiles = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+    }
+
+
+def render_card(data: bytes, seed: int) -> bytes:
+    avatar, color = decode_avatar(data)
+    return render(avatar, color, *create_member(seed))
+
+
+def measure_latency(avatars: list[tuple[str, int, bytes]], iterations: int) -> dict:
+    samples: dict[str, list[float]] = {kind: [] for kind in KINDS}
+
+    for iteration in range(iterations):
+        for seed, (kind, _, data) in enumerate(avatars):
+            start = time.perf_counter()
+            render_card(data, seed + iteration)
+            samples[kind].append(time.perf_counter() - start)
+
+    return {
+        "overall": percentiles([sample for values in samples.values() for sample in values]),
+        **{kind: percentiles(values) for kind, values in samples.items()},
+    }
+
+
+async def measure_throughput(avatars: list[tuple[str, int, bytes]], concurrency: int, workers: int) -> dict:
+    pool = RenderPool(workers=workers, max_queue=concurrency)
+
+    try:
+        # Warm up the workers so that process start up isn't measured.
+        await asyncio.gather(*(pool.run(render_card, data, seed) for seed, (_, _, data) in enumerate(avatars[:workers])))
+
+        jobs = [avatars[index % len(avatars)][2] for index in range(concurrency * 4)]
+        start = time.perf_counter()
+
+        for batch in range(0, len(jobs), concurrency):
+            await asyncio.gather(
+                *(pool.run(render_card, data, batch + index) for index, data in enumerate(jobs[batch : batch + concurrency]))
+            )
+
+        duration = time.perf_counter() - start
+    finally:
+        pool.close()
+
+    return {"concurrency": concurrency, "workers": workers, "cards": len(jobs), "cards_per_second": len(jobs) / duration}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks rendering rank cards offline with synthetic avatars and members, "
+        "printing the results as JSON. Run from the root of the repository."
+    )
+    parser.add_argument("--avatars", type=int, default=24, help="The amount of synthetic avatars.")
+    parser.add_argument("--iterations", type=int, default=5, help="The amount of times every avatar is rendered.")
+    parser.add_argument("--concurrency", type=int, default=8, help="The amount of renders running at once.")
+    parser.add_argument("--workers", type=int, default=0, help="The amount of worker processes, 0 for threads.")
+    parser.add_argument("--output", help="A file the results are written to instead of stdout.")
+    args = parser.parse_args()
+
+    with open("./pyproject.toml", "rb") as f:
+        version = tomli.load(f)["tool"]["poetry"]["version"]
+
+    avatars = create_avatars(args.avatars)
+    process = psutil.Process()
+
+    latency = measure_latency(avatars, args.iterations)
+    throughput = asyncio.run(measure_throughput(avatars, args.concurrency, args.workers))
+
+    # Memory is measured in a separate pass since tracing allocations slows rendering down.
+    rss = process.memory_info().rss
+    tracemalloc.start()
+
+    measure_latency(avatars, 1)
+
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    results = {
+        "version": version,
+        "python": platform.python_version(),
+        "timestamp": time.time(),
+        "renders": args.avatars * args.iterations,
+        "latency": latency,
+        "throughput": throughput,
+        "memory": {
+            "rss_growth_bytes": process.memory_info().rss - rss,
+            # ru_maxrss is reported in kilobytes on Linux.
+            "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 if resource else None,
+            "tracemalloc_current_bytes": current,
+            "tracemalloc_peak_bytes": peak,
+        },
+        "caches": cache_stats(),
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+    else:
+        print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
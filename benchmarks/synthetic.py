@@ -0,0 +1,73 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import random
+from io import BytesIO
+
+from PIL import Image, ImageDraw
+
+
+def create_avatar(seed: int, size: int = 256, *, transparent: bool = False) -> Image.Image:
+    """Creates a random avatar made of a background and a few overlapping shapes."""
+    rng = random.Random(seed)
+
+    def color(alpha: int = 255) -> tuple[int, int, int, int]:
+        return (rng.randrange(256), rng.randrange(256), rng.randrange(256), alpha)
+
+    image = Image.new("RGBA", (size, size), color(0 if transparent else 255))
+    draw = ImageDraw.Draw(image)
+
+    for _ in range(rng.randint(3, 12)):
+        x, y = rng.randrange(size), rng.randrange(size)
+        radius = rng.randint(size // 16, size // 3)
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=color())
+
+    return image
+
+
+def create_animated_avatar(seed: int, size: int = 256, frames: int = 8) -> bytes:
+    """Creates a random animated avatar encoded as GIF, of which only the first frame is rendered."""
+    images = [create_avatar(seed + frame, size).convert("RGB") for frame in range(frames)]
+
+    buffer = BytesIO()
+    images[0].save(buffer, "gif", save_all=True, append_images=images[1:], duration=100, loop=0)
+    return buffer.getvalue()
+
+
+def create_member(seed: int) -> tuple[str, str, int, int, int, int, int, int]:
+    """Creates the name, tag and numbers shown on the rank card of a random member."""
+    rng = random.Random(seed)
+    name = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz_") for _ in range(rng.randint(3, 32)))
+
+    return (
+        name,
+        f"{name}#{rng.randrange(10000):04}",
+        rng.randint(0, 500),
+        rng.randint(0, 10**5),
+        rng.randint(10**5, 10**6),
+        rng.randint(1, 10**6),
+        rng.randint(1, 10**6),
+        rng.randint(0, 10**7),
+    )
+
+
+def encode(image: Image.Image, format: str = "png") -> bytes:
+    buffer = BytesIO()
+    image.save(buffer, format)
+    return buffer.getvalue()
@@ -73,5 +73,6 @@ async def start() -> None:
         await bot.start(config.TOKEN)
 
 
-with suppress(KeyboardInterrupt):
-    asyncio.run(start())
+if __name__ == "__main__":
+    with suppress(KeyboardInterrupt):
+        asyncio.run(start())
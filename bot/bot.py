@@ -16,15 +16,26 @@ You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 import asyncio
+import functools
 import logging
 import os
 import pathlib
+import time
 
 import aiohttp
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 
-from bot import Plural, config, database, models
+from bot import (
+    GuildStatsRegistry,
+    JoinIndexRegistry,
+    MemberCachePolicy,
+    PluginTimer,
+    Plural,
+    config,
+    database,
+    models,
+)
 
 __log__ = logging.getLogger(__name__)
 
@@ -60,13 +71,127 @@ class Winston(commands.Bot):
             help_command=None,
             max_messages=None,
             tree_cls=models.CommandTree,
+            chunk_guilds_at_startup=config.MEMBERS.get("chunk_at_startup", True),
         )
 
         self.ERRORS_WEBHOOK = discord.Webhook.from_url(config.ERRORS_WEBHOOK_URL, session=self.session)
 
+        self.stats = GuildStatsRegistry()
+        self.join_positions = JoinIndexRegistry()
+
+        self.member_cache = MemberCachePolicy(**config.MEMBERS.get("cache", {}))
+
+        self._hydrations: dict[int, asyncio.Task[None]] = {}
+        self._hydrating: set[int] = set()
+        self._hydrated: set[int] = set()
+        self._hydration_semaphore = asyncio.Semaphore(config.MEMBERS.get("max_concurrent_hydrations", 2))
+        self._join_index_builds: dict[int, asyncio.Task[None]] = {}
+
+    def hydration_status(self, guild: discord.Guild) -> str:
+        """Returns whether the members of a guild are ``"hydrated"``, ``"hydrating"``, ``"queued"`` or ``"pending"``."""
+        if guild.chunked or guild.id in self._hydrated:
+            return "hydrated"
+        if guild.id in self._hydrating:
+            return "hydrating"
+        if guild.id in self._hydrations:
+            return "queued"
+
+        return "pending"
+
+    async def hydrate(self, guild: discord.Guild) -> None:
+        """
+        Chunks the members of a guild if they haven't been yet, used by commands which need the full member list
+        when guilds aren't chunked at startup. Concurrent calls for a guild wait on the same chunk request.
+        """
+        if guild.chunked or guild.id in self._hydrated:
+            return
+
+        if (task := self._hydrations.get(guild.id)) is None:
+            task = self._hydrations[guild.id] = asyncio.create_task(self._hydrate(guild))
+
+        await asyncio.shield(task)
+
+    async def _hydrate(self, guild: discord.Guild) -> None:
+        try:
+            async with self._hydration_semaphore:
+                self._hydrating.add(guild.id)
+                start = time.perf_counter()
+
+                if not guild.chunked:
+                    await guild.chunk()
+
+                self._hydrated.add(guild.id)
+
+                duration = time.perf_counter() - start
+                __log__.debug(f"Hydrated {Plural(len(guild.members)):Member} of guild {guild.id} in {duration:.2f}s")
+        finally:
+            self._hydrating.discard(guild.id)
+            del self._hydrations[guild.id]
+
+        # Built from a partial member list, rebuilt lazily on next use
+        self.stats.discard(guild.id)
+        self.join_positions.discard(guild.id)
+
+    async def _build_join_index(self, guild: discord.Guild) -> None:
+        await self.hydrate(guild)
+        self.join_positions.build(guild)
+
+    def _join_index_built(self, guild_id: int, task: asyncio.Task[None]) -> None:
+        del self._join_index_builds[guild_id]
+
+        if not task.cancelled() and (exc := task.exception()) is not None:
+            __log__.error(f"Failed to build the join index of guild {guild_id}.", exc_info=exc)
+
+    def _warmup(self, guild_ids: list[int]) -> None:
+        settings = dict(config.DATABASE_WARMUP)
+
+        if settings.pop("enabled", True) and hasattr(database.Manager, "pool"):
+            task = asyncio.create_task(database.Manager.warmup(guild_ids, **settings))
+            task.add_done_callback(self._warmup_done)
+
+    @staticmethod
+    def _warmup_done(task: asyncio.Task[int]) -> None:
+        if not task.cancelled() and (exc := task.exception()) is not None:
+            __log__.error("Failed to warm up the level config cache.", exc_info=exc)
+
+    async def get_or_fetch_member(self, guild: discord.Guild, member_id: int) -> discord.Member | None:
+        """Returns a member from the cache, otherwise fetches them as they might not be retained by the cache policy."""
+        if (member := guild.get_member(member_id)) is not None:
+            return member
+
+        try:
+            return await guild.fetch_member(member_id)
+        except discord.NotFound:
+            return None
+
+    @tasks.loop(minutes=10)
+    async def trim_member_cache(self) -> None:
+        start = time.perf_counter()
+        dropped = 0
+
+        for guild in self.guilds:
+            if guild.chunked:
+                # Statistics and join positions have to be built from the full member list before it's trimmed
+                self.stats.get(guild)
+                self.join_positions.get(guild)
+                self._hydrated.add(guild.id)
+
+            dropped += self.member_cache.trim(guild)
+
+        self.member_cache.expire()
+
+        duration = time.perf_counter() - start
+        __log__.debug(f"Dropped {Plural(dropped):Member} from the cache in {duration:.2f}s")
+
+    @trim_member_cache.before_loop
+    async def before_trim_member_cache(self) -> None:
+        await self.wait_until_ready()
+
     # Overrides
     async def setup_hook(self) -> None:
-        await database.Manager.init(**config.DATABASE)
+        await database.Manager.init(
+            **config.DATABASE, buffer=config.DATABASE_BUFFER, cache=config.DATABASE_CACHE, pool=config.DATABASE_POOL
+        )
 
         plugins = ["jishaku"]
 
@@ -81,34 +206,116 @@ class Winston(commands.Bot):
 
         __log__.debug(f"Plugins Detected: {', '.join(plugins)}")
 
+        # Imports still run one at a time on the event loop, but setups awaiting I/O overlap
+        with PluginTimer(plugins) as timer:
+            results = await asyncio.gather(*(self._load_plugin(plugin, timer) for plugin in plugins), return_exceptions=True)
+
         failed = 0
-        for plugin in plugins:
-            try:
-                await self.load_extension(plugin)
-            except Exception as exc:
+        timings = []
+        for plugin, result in zip(plugins, results):
+            if isinstance(result, BaseException):
                 failed += 1
-                __log__.error(f"Failed to load plugin '{plugin}'", exc_info=exc)
+                __log__.error(f"Failed to load plugin '{plugin}'", exc_info=result)
+            else:
+                timings.append((plugin, *result))
 
         __log__.info(
             f"Loaded {Plural(len(plugins) - failed):Plugin}"
             + (f" | Failed to load {Plural(failed):Plugin}" if failed else "")
         )
 
+        timings.sort(key=lambda timing: timing[1] + timing[2], reverse=True)
+        __log__.info(
+            "Plugin Load Times:\n"
+            + "\n".join(
+                f"{plugin}: {(imported + setup) * 1000:.1f}ms (Import: {imported * 1000:.1f}ms, Setup: {setup * 1000:.1f}ms)"
+                for plugin, imported, setup in timings
+            )
+        )
+
+        if self.member_cache.enabled:
+            self.trim_member_cache.start()
+
         return await super().setup_hook()
 
+    async def _load_plugin(self, plugin: str, timer: PluginTimer) -> tuple[float, float]:
+        """Loads a plugin, returns how long its module took to import and its setup took to run."""
+        try:
+            await self.load_extension(plugin)
+        finally:
+            # Otherwise the setups of the other plugins would wait for it forever
+            timer.imported(plugin)
+
+        return timer.imports.get(plugin, 0.0), timer.setups.get(plugin, 0.0)
+
     async def close(self) -> None:
         try:
             await super().close()
         finally:
-            await self.session.close()
+            try:
+                await database.Manager.close()
+            finally:
+                await self.session.close()
 
     # Events
     async def on_ready(self) -> None:
         message = "Reconnected"
 
+        # The cache was rebuilt, so events might have been missed
+        self.stats.clear()
+        self.join_positions.clear()
+        self._hydrated.clear()
+
+        for guild_id in config.JOIN_INDEX_GUILDS:
+            if (guild := self.get_guild(guild_id)) is not None and guild_id not in self._join_index_builds:
+                task = self._join_index_builds[guild_id] = asyncio.create_task(self._build_join_index(guild))
+                task.add_done_callback(functools.partial(self._join_index_built, guild_id))
+
         if not hasattr(self, "uptime"):
             message = "Logged in"
             self.uptime = discord.utils.utcnow()
 
+            # Largest guilds first, they are the most likely to be active while the backlog is replayed
+            guilds = sorted(self.guilds, key=lambda guild: guild.member_count or 0, reverse=True)
+            self._warmup([guild.id for guild in guilds])
+
         assert self.user is not None
         __log__.info(f"{message} as {self.user} [ID: {self.user.id}] | Running Winston [Version: {self.version}]")
+
+    async def on_member_join(self, member: discord.Member) -> None:
+        self.stats.on_member_join(member)
+        self.join_positions.on_member_join(member)
+
+    async def on_message(self, message: discord.Message) -> None:
+        if isinstance(message.author, discord.Member):
+            self.member_cache.touch(message.author)
+
+        await self.process_commands(message)
+
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent) -> None:
+        # Also dispatched for members which were dropped from the cache, unlike on_member_remove
+        self.stats.on_member_remove(payload.user, payload.guild_id)
+        self.join_positions.on_member_remove(payload.user, payload.guild_id)
+
+    async def on_member_update(self, before: discord.Member, after: discord.Member) -> None:
+        self.stats.on_member_update(before, after)
+
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel) -> None:
+        self.stats.on_guild_channel_update(channel)
+
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel) -> None:
+        self.stats.on_guild_channel_update(after)
+
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel) -> None:
+        self.stats.on_guild_channel_delete(channel)
+
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role) -> None:
+        self.stats.on_guild_role_update(before, after)
+
+    async def on_guild_join(self, guild: discord.Guild) -> None:
+        self._warmup([guild.id])
+
+    async def on_guild_remove(self, guild: discord.Guild) -> None:
+        self.stats.discard(guild.id)
+        self.join_positions.discard(guild.id)
+        self._hydrated.discard(guild.id)
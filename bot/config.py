@@ -26,6 +26,11 @@ OWNER_IDS = f["bot"]["settings"]["owner_ids"]
 
 ERRORS_WEBHOOK_URL = f["bot"]["webhooks"]["error"]
 
+MEMBERS = f["bot"].get("members", {})
+
+# Guilds large enough to build their join position index at startup rather than on first use
+JOIN_INDEX_GUILDS: list[int] = f["bot"].get("join_index", {}).get("guilds", [])
+
 MENU = discord.PartialEmoji(name="menu", id=f["bot"]["emojis"]["menu"])
 EDIT = discord.PartialEmoji(name="edit", id=f["bot"]["emojis"]["edit"])
 COLOR = discord.PartialEmoji(name="color", id=f["bot"]["emojis"]["color"])
@@ -42,3 +47,11 @@ for name, id in f["bot"]["badges"].items():
     BADGES[name] = discord.PartialEmoji(name=name, id=id)
 
 DATABASE = f["database"]["settings"]
+DATABASE_BUFFER = f["database"].get("buffer", {})
+DATABASE_CACHE = f["database"].get("cache", {})
+DATABASE_POOL = f["database"].get("pool", {})
+DATABASE_WARMUP = f["database"].get("warmup", {})
+
+RENDER = f.get("leveling", {}).get("render", {})
+AVATARS = f.get("leveling", {}).get("avatars", {})
+ENCODER = f.get("leveling", {}).get("encoder", {})
@@ -15,4 +15,6 @@ GNU Affero General Public License for more details.
 You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+from .cache import LRUCache
 from .manager import Manager
+from .objects import LevelConfig, LevelRecord
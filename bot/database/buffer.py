@@ -0,0 +1,238 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import contextmanager, suppress
+from typing import TYPE_CHECKING, Callable, Iterator
+
+import asyncpg
+
+if TYPE_CHECKING:
+    from .objects import LevelConfig
+
+__log__ = logging.getLogger(__name__)
+
+FLUSH_QUERY = """
+    INSERT INTO levels (user_id, guild_id, messages, experience)
+    SELECT * FROM unnest($1::BIGINT[], $2::BIGINT[], $3::INT[], $4::INT[])
+    ON CONFLICT (user_id, guild_id) DO UPDATE
+    SET messages = levels.messages + excluded.messages, experience = levels.experience + excluded.experience
+"""
+
+
+class ExperienceBuffer:
+    """
+    Represents a write-behind buffer for message and experience deltas. Deltas are applied
+    to the cached :class:`LevelConfig` immediately and written to the ``levels`` table in
+    batches, either periodically or once enough members have pending deltas.
+
+    Parameters
+    ----------
+    pool: :class:`asyncpg.Pool`
+        The pool used for flushing the deltas.
+    flush_interval: :class:`float`, default=10.0
+        The interval in seconds between periodic flushes. If ``0`` then buffering is disabled.
+    max_batch: :class:`int`, default=500
+        The maximum amount of rows written by a single statement. A flush is also scheduled as
+        soon as this many members have pending deltas.
+    on_flush: Callable[[set[:class:`int`]], ``None``] | ``None``, default=None
+        A function called with the guild IDs of every batch once it has been written.
+
+    Attributes
+    ----------
+    flushing: dict[:class:`int`, set[:class:`int`]]
+        The IDs of the members whose deltas are being written, by guild ID. Their deltas are
+        no longer pending but might not be committed yet, so rows read for them are ambiguous
+        until the flush is done.
+    """
+
+    def __init__(
+        self,
+        pool: asyncpg.Pool,
+        *,
+        flush_interval: float = 10.0,
+        max_batch: int = 500,
+        on_flush: Callable[[set[int]], None] | None = None,
+    ) -> None:
+        self.pool = pool
+        self.flush_interval = flush_interval
+        self.max_batch = max(max_batch, 1)
+        self.on_flush = on_flush
+
+        self.pending: dict[tuple[int, int], list[int]] = {}
+        self.flushing: dict[int, set[int]] = {}
+
+        self.flushes = 0
+        self.flushed = 0
+        self.last_flush_latency = 0.0
+        self.total_flush_latency = 0.0
+
+        self._lock = asyncio.Lock()
+        self._flushed = asyncio.Event()
+        self._flushed.set()
+        self._watchers: dict[int, list[set[int]]] = {}
+        self._closing = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._scheduled: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        """:class:`bool` Whether or not deltas are buffered. If ``False`` they should be written directly."""
+        return self.flush_interval > 0
+
+    @property
+    def stats(self) -> dict[str, int | float]:
+        """:class:`dict` The pending delta and flush latency counters of this buffer."""
+        return {
+            "pending": len(self.pending),
+            "flushing": sum(len(user_ids) for user_ids in self.flushing.values()),
+            "flushes": self.flushes,
+            "flushed": self.flushed,
+            "last_flush_latency": self.last_flush_latency,
+            "average_flush_latency": self.total_flush_latency / self.flushes if self.flushes else 0.0,
+        }
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._closing.is_set():
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._closing.wait(), timeout=self.flush_interval)
+
+            try:
+                await self.flush()
+            except Exception as exc:
+                __log__.error("Unexpected error while flushing the experience buffer.", exc_info=exc)
+
+    def add(self, level_config: LevelConfig, messages: int, experience: int) -> None:
+        """Applies the deltas to the level config and queues them for the next flush."""
+        level_config.messages += messages
+        level_config.experience += experience
+
+        delta = self.pending.setdefault((level_config.user_id, level_config.guild_id), [0, 0])
+        delta[0] += messages
+        delta[1] += experience
+
+        if len(self.pending) >= self.max_batch and (self._scheduled is None or self._scheduled.done()):
+            self._scheduled = asyncio.create_task(self.flush())
+
+    def discard_experience(self, user_id: int, guild_id: int) -> None:
+        """
+        Drops the pending experience delta of a member, used when their experience is overwritten.
+        A delta which is already being flushed can't be dropped, see :meth:`watch`.
+        """
+        if delta := self.pending.get((user_id, guild_id)):
+            delta[1] = 0
+
+    async def wait_flushed(self) -> None:
+        """Waits until the flush in progress, if any, is done."""
+        await self._flushed.wait()
+
+    @contextmanager
+    def watch(self, guild_id: int) -> Iterator[set[int]]:
+        """
+        Watches the flushes of a guild while its rows are read. The set yielded receives the IDs
+        of the members whose deltas start being flushed, starting with those being flushed already.
+        Rows read for them might or might not include their deltas, so they should be read again
+        once :meth:`wait_flushed` returns. Pending deltas can be added on top of every other row.
+        """
+        watched = set(self.flushing.get(guild_id, ()))
+        watchers = self._watchers.setdefault(guild_id, [])
+        watchers.append(watched)
+
+        try:
+            yield watched
+        finally:
+            # Removed by identity, watchers of the same members compare equal.
+            watchers[:] = [other for other in watchers if other is not watched]
+            if not watchers:
+                del self._watchers[guild_id]
+
+    async def flush(self) -> int:
+        """Writes all the pending deltas to the database and returns the amount of rows written."""
+        async with self._lock:
+            if not self.pending:
+                return 0
+
+            batch, self.pending = list(self.pending.items()), {}
+            self._flushed.clear()
+
+            for (user_id, guild_id), _ in batch:
+                self.flushing.setdefault(guild_id, set()).add(user_id)
+
+                for watched in self._watchers.get(guild_id, ()):
+                    watched.add(user_id)
+
+            try:
+                return await self._write(batch)
+            finally:
+                self.flushing.clear()
+                self._flushed.set()
+
+    async def _write(self, batch: list[tuple[tuple[int, int], list[int]]]) -> int:
+        written = 0
+
+        for index in range(0, len(batch), self.max_batch):
+            chunk = batch[index : index + self.max_batch]
+            start = time.perf_counter()
+
+            try:
+                await self.pool.execute(
+                    FLUSH_QUERY,
+                    [user_id for (user_id, _), _ in chunk],
+                    [guild_id for (_, guild_id), _ in chunk],
+                    [messages for _, (messages, _) in chunk],
+                    [experience for _, (_, experience) in chunk],
+                )
+            except Exception as exc:
+                # Requeue everything which was not written so that no deltas are lost.
+                for key, (messages, experience) in batch[index:]:
+                    delta = self.pending.setdefault(key, [0, 0])
+                    delta[0] += messages
+                    delta[1] += experience
+
+                __log__.error(f"Failed to flush {len(batch) - index} experience deltas.", exc_info=exc)
+                break
+
+            self.last_flush_latency = time.perf_counter() - start
+            self.total_flush_latency += self.last_flush_latency
+            self.flushes += 1
+            self.flushed += len(chunk)
+            written += len(chunk)
+
+            if self.on_flush is not None:
+                self.on_flush({guild_id for (_, guild_id), _ in chunk})
+
+        __log__.debug(f"Flushed {written} experience deltas in {self.last_flush_latency * 1000:.2f}ms.")
+        return written
+
+    async def close(self) -> None:
+        """Stops the periodic flush and drains all the pending deltas."""
+        self._closing.set()
+
+        for task in (self._task, self._scheduled):
+            if task is not None:
+                await asyncio.gather(task, return_exceptions=True)
+
+        self._task = self._scheduled = None
+        await self.flush()
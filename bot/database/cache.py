@@ -0,0 +1,123 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, TypeVar, overload
+
+K = TypeVar("K")
+V = TypeVar("V")
+T = TypeVar("T")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Represents a least recently used cache bounded by size and optionally by age.
+
+    Parameters
+    ----------
+    max_size: :class:`int`
+        The maximum amount of entries. The least recently used entry is evicted once exceeded.
+    ttl: :class:`float` | ``None``, default=None
+        The time in seconds after which an entry expires. If ``None`` then entries never expire.
+    on_evict: Callable[[K, V], ``None``] | ``None``, default=None
+        A function called with every entry evicted to make room for new entries.
+    """
+
+    def __init__(self, max_size: int, ttl: float | None = None, on_evict: Callable[[K, V], None] | None = None) -> None:
+        self.max_size = max(max_size, 1)
+        self.ttl = ttl
+        self.on_evict = on_evict
+
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return self.peek(key) is not None
+
+    def __setitem__(self, key: K, value: V) -> None:
+        self._data[key] = (time.monotonic() + self.ttl if self.ttl else 0.0, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_size:
+            evicted, (_, value) = self._data.popitem(last=False)
+            self.evictions += 1
+
+            if self.on_evict is not None:
+                self.on_evict(evicted, value)
+
+    @property
+    def stats(self) -> dict[str, int | float]:
+        """:class:`dict` The size, hit, miss and eviction counters of this cache."""
+        lookups = self.hits + self.misses
+
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _expired(self, key: K, expires: float) -> bool:
+        if self.ttl and expires <= time.monotonic():
+            del self._data[key]
+            self.evictions += 1
+            return True
+        return False
+
+    @overload
+    def get(self, key: K) -> V | None:
+        ...
+
+    @overload
+    def get(self, key: K, default: T) -> V | T:
+        ...
+
+    def get(self, key: K, default: T | None = None) -> V | T | None:
+        """Returns the value of a key and marks it as recently used, counting the hit or miss."""
+        if (entry := self._data.get(key)) is None or self._expired(key, entry[0]):
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+
+        return entry[1]
+
+    def peek(self, key: K) -> V | None:
+        """Returns the value of a key without marking it as recently used or counting the lookup."""
+        if (entry := self._data.get(key)) is None or self._expired(key, entry[0]):
+            return None
+        return entry[1]
+
+    def pop(self, key: K, default: T | None = None) -> V | T | None:
+        if (entry := self._data.pop(key, None)) is None:
+            return default
+        return entry[1]
+
+    def clear(self) -> None:
+        self._data.clear()
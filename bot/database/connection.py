@@ -0,0 +1,142 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any
+
+import asyncpg
+
+# The statements run on every message or command, prepared once per connection through the statement cache.
+STATEMENTS = {
+    "select_level_config": "SELECT * FROM levels WHERE user_id = $1 AND guild_id = $2",
+    "insert_level_config": """
+        INSERT INTO levels (user_id, guild_id)
+        VALUES ($1, $2)
+        ON CONFLICT (user_id, guild_id) DO NOTHING
+        RETURNING *
+    """,
+    "award": """
+        INSERT INTO levels (user_id, guild_id, messages, experience)
+        VALUES ($1, $2, $3, $4)
+        ON CONFLICT (user_id, guild_id) DO UPDATE
+        SET messages = levels.messages + excluded.messages, experience = levels.experience + excluded.experience
+        RETURNING messages - $3 AS old_messages, experience - $4 AS old_experience, messages, experience
+    """,
+    "set_experience": """
+        INSERT INTO levels (user_id, guild_id, experience)
+        VALUES ($2, $3, $1)
+        ON CONFLICT (user_id, guild_id) DO UPDATE
+        SET experience = excluded.experience
+        RETURNING experience
+    """,
+    "set_messages": """
+        INSERT INTO levels (user_id, guild_id, messages)
+        VALUES ($2, $3, $1)
+        ON CONFLICT (user_id, guild_id) DO UPDATE
+        SET messages = excluded.messages
+        RETURNING messages
+    """,
+    "get_rank": """
+        SELECT * FROM (
+            SELECT user_id, guild_id, row_number() OVER (ORDER BY experience DESC, user_id DESC) AS rank
+            FROM levels
+            WHERE guild_id = $2
+        ) AS x
+        WHERE user_id = $1 AND guild_id = $2
+    """,
+}
+
+
+class DatabaseMetrics:
+    """Represents the acquire wait times of a pool and the latencies of its prepared statements."""
+
+    def __init__(self) -> None:
+        self.acquires = 0
+        self.total_acquire_wait = 0.0
+        self.max_acquire_wait = 0.0
+
+        # Statement name -> [executions, total latency, max latency]
+        self.statements: dict[str, list[Any]] = {}
+
+    def record_acquire(self, wait: float) -> None:
+        self.acquires += 1
+        self.total_acquire_wait += wait
+        self.max_acquire_wait = max(self.max_acquire_wait, wait)
+
+    def record_statement(self, name: str, latency: float) -> None:
+        if (stats := self.statements.get(name)) is None:
+            stats = self.statements[name] = [0, 0.0, 0.0]
+
+        stats[0] += 1
+        stats[1] += latency
+        stats[2] = max(stats[2], latency)
+
+    def stats(self, pool: asyncpg.Pool | None = None) -> dict[str, Any]:
+        """Returns the size of a pool along with the acquire and statement counters."""
+        stats: dict[str, Any] = {}
+
+        if pool is not None:
+            size = pool.get_size()
+            stats["pool"] = {
+                "size": size,
+                "in_use": size - pool.get_idle_size(),
+                "min_size": pool.get_min_size(),
+                "max_size": pool.get_max_size(),
+            }
+
+        stats["acquire"] = {
+            "count": self.acquires,
+            "average_wait": self.total_acquire_wait / self.acquires if self.acquires else 0.0,
+            "max_wait": self.max_acquire_wait,
+        }
+        stats["statements"] = {
+            name: {"count": count, "average": total / count, "max": maximum}
+            for name, (count, total, maximum) in self.statements.items()
+        }
+
+        return stats
+
+
+class Connection(asyncpg.Connection):
+    """
+    Represents a connection which runs the hot statements in :data:`STATEMENTS` by name and
+    records how long they take. They are prepared the first time they are run on a connection
+    and reused from asyncpg's statement cache afterwards, which also re-prepares them if the
+    schema changes.
+    """
+
+    metrics = DatabaseMetrics()
+
+    async def fetchrow_prepared(self, name: str, *args: Any) -> asyncpg.Record | None:
+        # PreparedStatement objects are bound to a single acquisition of a pooled connection, so
+        # they can't be kept between uses. The statement cache is keyed by query and outlives them.
+        start = time.perf_counter()
+        try:
+            return await self.fetchrow(STATEMENTS[name], *args)
+        finally:
+            self.metrics.record_statement(name, time.perf_counter() - start)
+
+
+async def fetchrow(pool: asyncpg.Pool, name: str, *args: Any) -> Any:
+    """Runs a prepared statement on a connection from a pool, recording how long acquiring it took."""
+    start = time.perf_counter()
+
+    async with pool.acquire() as connection:
+        Connection.metrics.record_acquire(time.perf_counter() - start)
+        return await connection.fetchrow_prepared(name, *args)
@@ -0,0 +1,86 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+from bisect import bisect_right
+from typing import Callable, Iterable
+
+
+class LevelCurve:
+    """
+    Represents an experience curve. The total experience required for each level is
+    precomputed once so that levels can be looked up with a binary search.
+
+    Parameters
+    ----------
+    experience: Callable[[:class:`int`], :class:`int`]
+        A strictly increasing function returning the total experience required for reaching a level.
+    max_level: :class:`int`, default=500
+        The level up to which the table is precomputed. The table grows on demand past this level.
+    """
+
+    def __init__(self, experience: Callable[[int], int], *, max_level: int = 500) -> None:
+        self.experience = experience
+        self.thresholds = [experience(level) for level in range(max_level + 2)]
+
+    def _extend(self, experience: int) -> None:
+        while self.thresholds[-1] <= experience:
+            self.thresholds.append(self.experience(len(self.thresholds)))
+
+    def get_experience(self, level: int) -> int:
+        """Returns the total experience required for reaching a certain level."""
+        if level < len(self.thresholds):
+            return self.thresholds[level]
+        return self.experience(level)
+
+    def get_required(self, level: int) -> int:
+        """Returns the experience required for reaching the next level."""
+        return self.get_experience(level + 1) - self.get_experience(level)
+
+    def level(self, experience: int) -> int:
+        """Returns the level reached with a certain amount of total experience."""
+        if experience >= self.thresholds[-1]:
+            self._extend(experience)
+
+        return max(bisect_right(self.thresholds, experience) - 1, 0)
+
+    def levels(self, experiences: Iterable[int]) -> list[int]:
+        """
+        Returns the levels reached for each amount of total experience. The values are sorted
+        once and matched against the table in a single sweep, which is cheaper than a binary
+        search per value for large batches such as leaderboards.
+        """
+        values = list(experiences)
+        if not values:
+            return []
+
+        self._extend(max(values))
+        thresholds = self.thresholds
+
+        levels = [0] * len(values)
+        level = 0
+
+        for index in sorted(range(len(values)), key=values.__getitem__):
+            while thresholds[level + 1] <= values[index]:
+                level += 1
+            levels[index] = level
+
+        return levels
+
+
+DEFAULT_CURVE = LevelCurve(lambda level: (level**3) + (104 * level))
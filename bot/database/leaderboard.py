@@ -0,0 +1,77 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+from .objects import LevelRecord
+
+
+class LeaderboardCache:
+    """
+    Represents a cache of the top leaderboard pages of each guild. The pages of a guild
+    are invalidated whenever an experience change could move a member in or out of them.
+
+    Parameters
+    ----------
+    pages: :class:`int`, default=3
+        The amount of top pages cached per guild.
+    """
+
+    def __init__(self, pages: int = 3) -> None:
+        self.pages = pages
+
+        self.guilds: dict[int, dict[int, list[LevelRecord]]] = {}
+        self._members: dict[int, set[int]] = {}
+        self._floors: dict[int, int] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """:class:`dict` The size and hit counters of this cache."""
+        return {"guilds": len(self.guilds), "hits": self.hits, "misses": self.misses}
+
+    def get(self, guild_id: int, page: int) -> list[LevelRecord] | None:
+        if page >= self.pages:
+            return None
+
+        if (records := self.guilds.get(guild_id, {}).get(page)) is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return records
+
+    def set(self, guild_id: int, page: int, records: list[LevelRecord]) -> None:
+        if page >= self.pages or not records:
+            return
+
+        self.guilds.setdefault(guild_id, {})[page] = records
+        self._members.setdefault(guild_id, set()).update(record["user_id"] for record in records)
+        self._floors[guild_id] = min(self._floors.get(guild_id, records[-1]["experience"]), records[-1]["experience"])
+
+    def invalidate(self, guild_id: int, user_id: int, experience: int) -> None:
+        if guild_id not in self.guilds:
+            return
+
+        if user_id in self._members[guild_id] or experience >= self._floors[guild_id]:
+            self.invalidate_guild(guild_id)
+
+    def invalidate_guild(self, guild_id: int) -> None:
+        if guild_id in self.guilds:
+            del self.guilds[guild_id], self._members[guild_id], self._floors[guild_id]
@@ -17,14 +17,26 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
+from typing import Any, Iterable
 
 import asyncpg
 
+from .buffer import ExperienceBuffer
+from .cache import LRUCache
+from .connection import Connection, DatabaseMetrics, fetchrow
+from .leaderboard import LeaderboardCache
+from .migrations import check_indexes, migrate
 from .objects import LevelConfig, LevelRecord
+from .ranking import RankingIndex
 
 __log__ = logging.getLogger(__name__)
 
+# Approximate size in bytes of a cached level config including its key and the cache bookkeeping.
+LEVEL_CONFIG_SIZE = 400
+
 
 class Manager:
     """
@@ -33,41 +45,258 @@ class Manager:
     """
 
     pool: asyncpg.Pool
-    levels_cache: dict[int, LevelConfig] = {}
+    buffer: ExperienceBuffer
+    levels_cache: LRUCache[tuple[int, int], LevelConfig] = LRUCache(max_size=(64 * 1024**2) // LEVEL_CONFIG_SIZE)
+    rankings: RankingIndex = RankingIndex()
+    leaderboards: LeaderboardCache = LeaderboardCache()
+    metrics: DatabaseMetrics = Connection.metrics
+
+    # Level configs being fetched and the amount of cache misses which waited on one instead.
+    _inflight: dict[tuple[int, int], asyncio.Task[LevelConfig]] = {}
+    coalesced: int = 0
 
     @classmethod
-    async def init(cls, host: str, user: str, database: str, password: str) -> None:
+    async def init(
+        cls,
+        host: str,
+        user: str,
+        database: str,
+        password: str,
+        *,
+        buffer: dict[str, Any] | None = None,
+        cache: dict[str, Any] | None = None,
+        pool: dict[str, Any] | None = None,
+    ) -> None:
+        cache = cache or {}
+        cls.levels_cache = LRUCache(
+            max_size=int(cache.get("max_memory", 64) * 1024**2) // LEVEL_CONFIG_SIZE, ttl=cache.get("ttl")
+        )
+
         try:
-            pool = await asyncpg.create_pool(host=host, user=user, database=database, password=password)
+            connection_pool = await asyncpg.create_pool(
+                host=host, user=user, database=database, password=password, connection_class=Connection, **(pool or {})
+            )
         except Exception as exc:
             return __log__.error("Failed to instantiate the database manager.", exc_info=exc)
 
-        assert pool is not None
-        cls.pool = pool
+        assert connection_pool is not None
+        cls.pool = connection_pool
+
+        try:
+            async with connection_pool.acquire() as connection:
+                await migrate(connection)
+                await check_indexes(connection)
+        except Exception as exc:
+            __log__.error("Failed to migrate the database.", exc_info=exc)
+
+        cls.buffer = ExperienceBuffer(connection_pool, on_flush=cls._on_flush, **(buffer or {}))
+        cls.buffer.start()
 
         __log__.info("Instantiated database manager successfully.")
 
     @classmethod
-    async def fetch_level_config(cls, user_id: int, guild_id: int) -> LevelConfig:
-        record: LevelRecord = await cls.pool.fetchrow(
-            """
-            INSERT INTO levels (user_id, guild_id) 
-            VALUES ($1, $2)
-            ON CONFLICT (user_id, guild_id) DO UPDATE 
-            SET user_id = excluded.user_id, guild_id = excluded.guild_id
-            RETURNING *""",
-            user_id,
-            guild_id,
-        )
+    async def close(cls) -> None:
+        if hasattr(cls, "buffer"):
+            await cls.buffer.close()
+
+        if hasattr(cls, "pool"):
+            await cls.pool.close()
+
+    @classmethod
+    async def fetch_level_config(cls, user_id: int, guild_id: int, *, create: bool = True) -> LevelConfig:
+        """
+        Fetches a level config, reading it first and only inserting a row if it doesn't exist. If ``create``
+        is False a missing row isn't inserted and a zero valued level config is returned instead, every write
+        to the ``levels`` table is an upsert so it's created once there's something to write.
+        """
+        with cls.buffer.watch(guild_id) as watched:
+            while True:
+                # The row would be ambiguous while a batch with the member's deltas is being written.
+                while user_id in watched:
+                    watched.discard(user_id)
+                    await cls.buffer.wait_flushed()
+
+                record: LevelRecord | None = await fetchrow(cls.pool, "select_level_config", user_id, guild_id)
+
+                if record is None and create:
+                    # Selected again if another connection inserted the row in the meantime
+                    record = await fetchrow(cls.pool, "insert_level_config", user_id, guild_id) or await fetchrow(
+                        cls.pool, "select_level_config", user_id, guild_id
+                    )
+
+                # Read again if their deltas started being flushed while it was read.
+                if user_id not in watched:
+                    break
+
+        if record is None:
+            record = {"user_id": user_id, "guild_id": guild_id, "messages": 0, "experience": 0}
+
         level_config = LevelConfig(record=record)
 
-        cls.levels_cache[int(str(user_id) + str(guild_id))] = level_config
+        # The cached level config was evicted while it still had deltas waiting to be flushed.
+        if delta := cls.buffer.pending.get((user_id, guild_id)):
+            level_config.messages += delta[0]
+            level_config.experience += delta[1]
+
+        cls.levels_cache[(user_id, guild_id)] = level_config
         return level_config
 
     @classmethod
-    async def get_level_config(cls, user_id: int, guild_id: int) -> LevelConfig:
+    async def get_level_config(cls, user_id: int, guild_id: int, *, create: bool = True) -> LevelConfig:
+        """
+        Returns a level config from the cache, otherwise fetches it. Concurrent misses for the same
+        member share a single fetch instead of each sending their own queries.
+        """
+        if level_config := cls.levels_cache.get((user_id, guild_id)):
+            return level_config
 
-        if not (level_config := cls.levels_cache.get(int(str(user_id) + str(guild_id)))):
-            level_config = await cls.fetch_level_config(user_id, guild_id)
+        if (task := cls._inflight.get((user_id, guild_id))) is not None:
+            cls.coalesced += 1
+        else:
+            task = cls._inflight[(user_id, guild_id)] = asyncio.create_task(
+                cls.fetch_level_config(user_id, guild_id, create=create)
+            )
+            task.add_done_callback(lambda _: cls._inflight.pop((user_id, guild_id), None))
 
-        return level_config
+        # Shielded so that a cancelled caller doesn't cancel the fetch the others are waiting on
+        return await asyncio.shield(task)
+
+    @classmethod
+    async def warmup(cls, guild_ids: Iterable[int], *, rows_per_guild: int = 500, max_rows: int = 100_000) -> int:
+        """
+        Loads the level configs of the most active members of guilds into the cache, streaming one query per
+        guild until ``max_rows`` have been loaded. Level configs which are already cached are kept since they
+        might be newer. Returns the amount of level configs loaded.
+        """
+        start = time.perf_counter()
+        budget = min(max_rows, cls.levels_cache.max_size)
+        loaded = 0
+
+        for guild_id in guild_ids:
+            if budget <= 0:
+                break
+
+            # Acquired per guild so that the warmup never holds a connection for longer than one query.
+            async with cls.pool.acquire() as connection, connection.transaction(readonly=True):
+                # There's no activity timestamp, members with the most experience are the most active overall.
+                records = connection.cursor(
+                    "SELECT * FROM levels WHERE guild_id = $1 ORDER BY experience DESC, user_id DESC LIMIT $2",
+                    guild_id,
+                    min(rows_per_guild, budget),
+                )
+
+                with cls.buffer.watch(guild_id) as watched:
+                    async for record in records:
+                        budget -= 1
+
+                        # Members whose deltas were flushed meanwhile are left to be fetched when they're used.
+                        if (key := (record["user_id"], guild_id)) in cls.levels_cache or record["user_id"] in watched:
+                            continue
+
+                        level_config = LevelConfig(record=record)
+
+                        if delta := cls.buffer.pending.get(key):
+                            level_config.messages += delta[0]
+                            level_config.experience += delta[1]
+
+                        cls.levels_cache[key] = level_config
+                        loaded += 1
+
+        __log__.info(f"Warmed up the cache with {loaded} level configs in {time.perf_counter() - start:.2f}s.")
+        return loaded
+
+    @classmethod
+    def _on_flush(cls, guild_ids: set[int]) -> None:
+        # Pages fetched while the deltas were pending were built from rows which are now outdated.
+        for guild_id in guild_ids:
+            cls.leaderboards.invalidate_guild(guild_id)
+
+    @classmethod
+    def store(cls, level_config: LevelConfig) -> None:
+        """Stores a level config in the cache and updates the ranking of its guild."""
+        cls.levels_cache[(level_config.user_id, level_config.guild_id)] = level_config
+        cls.rankings.update(level_config.guild_id, level_config.user_id, level_config.experience)
+        cls.leaderboards.invalidate(level_config.guild_id, level_config.user_id, level_config.experience)
+
+    @classmethod
+    async def award(cls, level_config: LevelConfig, messages: int, experience: int) -> int:
+        """
+        Awards messages and experience to a user, either through the buffer or directly
+        if buffering is disabled. Returns the total experience before the award.
+        """
+        if not cls.buffer.enabled:
+            return (await level_config.award(cls.pool, messages, experience))["old_experience"]
+
+        previous = level_config.experience
+        cls.buffer.add(level_config, messages, experience)
+        cls.store(level_config)
+
+        return previous
+
+    @classmethod
+    async def count_levels(cls, guild_id: int) -> int:
+        """Returns the amount of members with a level config in a guild."""
+        if (ranking := cls.rankings.get(guild_id)) is not None:
+            return len(ranking)
+
+        return await cls.pool.fetchval("SELECT count(*) FROM levels WHERE guild_id = $1", guild_id)
+
+    @classmethod
+    async def fetch_leaderboard(
+        cls,
+        guild_id: int,
+        limit: int,
+        *,
+        after: tuple[int, int] | None = None,
+        before: tuple[int, int] | None = None,
+        last: bool = False,
+        exclude: int | None = None,
+    ) -> list[LevelRecord]:
+        """
+        Fetches a page of the leaderboard ordered by experience, paginating by the (experience, user_id)
+        keyset instead of an offset. ``after`` and ``before`` are the keys of the rows bordering the page,
+        if ``last`` is True the bottom of the leaderboard is fetched. ``exclude`` leaves a member out of
+        the rows after or before a key, used when the key is theirs and their row might not be flushed yet.
+        """
+        if after is not None:
+            return await cls.pool.fetch(
+                """
+                SELECT * FROM levels
+                WHERE guild_id = $1 AND (experience, user_id) < ($2, $3) AND user_id IS DISTINCT FROM $5
+                ORDER BY experience DESC, user_id DESC
+                LIMIT $4
+                """,
+                guild_id,
+                *after,
+                limit,
+                exclude,
+            )
+
+        if before is not None:
+            records = await cls.pool.fetch(
+                """
+                SELECT * FROM levels
+                WHERE guild_id = $1 AND (experience, user_id) > ($2, $3) AND user_id IS DISTINCT FROM $5
+                ORDER BY experience ASC, user_id ASC
+                LIMIT $4
+                """,
+                guild_id,
+                *before,
+                limit,
+                exclude,
+            )
+            return records[::-1]
+
+        if last:
+            records = await cls.pool.fetch(
+                "SELECT * FROM levels WHERE guild_id = $1 ORDER BY experience ASC, user_id ASC LIMIT $2",
+                guild_id,
+                limit,
+            )
+            return records[::-1]
+
+        return await cls.pool.fetch(
+            "SELECT * FROM levels WHERE guild_id = $1 ORDER BY experience DESC, user_id DESC LIMIT $2",
+            guild_id,
+            limit,
+        )
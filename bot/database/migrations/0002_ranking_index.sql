@@ -0,0 +1,5 @@
+-- Serves the rank window query, leaderboard pages and the cache warmup, all ordered by experience within a guild.
+CREATE INDEX IF NOT EXISTS levels_guild_id_experience_user_id_idx ON levels (guild_id, experience DESC, user_id DESC);
+
+-- Duplicates the primary key, it only slowed down writes.
+DROP INDEX IF EXISTS levels_guild_id_user_id_idx;
@@ -0,0 +1,94 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import logging
+import pathlib
+import re
+
+import asyncpg
+
+__log__ = logging.getLogger(__name__)
+
+PATH = pathlib.Path(__file__).parent
+
+# Arbitrary key of the advisory lock held while migrating, so that instances starting at once don't race.
+LOCK_KEY = 0x77696E73746F6E
+
+# Indexes the hot queries rely on, by table.
+REQUIRED_INDEXES = {"levels": ("levels_pkey", "levels_guild_id_experience_user_id_idx")}
+
+
+def load_migrations() -> list[tuple[int, str, str]]:
+    """Returns the version, name and SQL of every migration in this package ordered by version."""
+    migrations = []
+
+    for path in PATH.glob("*.sql"):
+        if (match := re.fullmatch(r"(\d+)_(\w+)\.sql", path.name)) is None:
+            raise ValueError(f"Migration '{path.name}' must be named <version>_<name>.sql")
+
+        migrations.append((int(match[1]), match[2], path.read_text()))
+
+    migrations.sort()
+    return migrations
+
+
+async def migrate(connection: asyncpg.Connection) -> list[int]:
+    """Applies the migrations which haven't been applied yet in a single transaction, returns their versions."""
+    applied = []
+
+    async with connection.transaction():
+        await connection.execute("SELECT pg_advisory_xact_lock($1)", LOCK_KEY)
+        await connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+            """
+        )
+
+        versions = {record["version"] for record in await connection.fetch("SELECT version FROM schema_migrations")}
+
+        for version, name, query in load_migrations():
+            if version in versions:
+                continue
+
+            await connection.execute(query)
+            await connection.execute("INSERT INTO schema_migrations (version, name) VALUES ($1, $2)", version, name)
+
+            __log__.info(f"Applied migration {version:04} ({name}).")
+            applied.append(version)
+
+    return applied
+
+
+async def check_indexes(connection: asyncpg.Connection) -> list[str]:
+    """Warns about and returns the required indexes which are missing."""
+    records = await connection.fetch(
+        "SELECT tablename, indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = any($1::TEXT[])",
+        list(REQUIRED_INDEXES),
+    )
+    existing = {(record["tablename"], record["indexname"]) for record in records}
+
+    missing = [index for table, indexes in REQUIRED_INDEXES.items() for index in indexes if (table, index) not in existing]
+    for index in missing:
+        __log__.warning(f"Required index '{index}' is missing, queries depending on it will be slow.")
+
+    return missing
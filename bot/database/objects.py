@@ -21,6 +21,9 @@ import asyncpg
 
 from bot import database
 
+from .connection import fetchrow
+from .curve import DEFAULT_CURVE, LevelCurve
+
 
 class LevelRecord(TypedDict):
     user_id: int
@@ -29,7 +32,18 @@ class LevelRecord(TypedDict):
     experience: int
 
 
+class AwardRecord(TypedDict):
+    old_messages: int
+    old_experience: int
+    messages: int
+    experience: int
+
+
 class LevelConfig:
+    __slots__ = ("user_id", "guild_id", "messages", "experience")
+
+    curve: LevelCurve = DEFAULT_CURVE
+
     def __init__(self, record: LevelRecord) -> None:
         self.user_id = record["user_id"]
         self.guild_id = record["guild_id"]
@@ -39,56 +53,74 @@ class LevelConfig:
     @property
     def level(self) -> int:
         """Returns the current level of a user from their total experience."""
-        level = 0
-
-        while (self.experience - self.get_experience(level)) >= self.get_required(level):
-            level += 1
+        return self.curve.level(self.experience)
 
-        return level
+    def get_level(self, experience: int) -> int:
+        """Returns the level reached with a certain amount of total experience."""
+        return self.curve.level(experience)
 
     def get_experience(self, level: int) -> int:
         """Returns the total experience required for reaching a certain level."""
-        return (level**3) + (104 * level)
+        return self.curve.get_experience(level)
 
     def get_required(self, level: int) -> int:
         """Returns the experience required for reaching the next level."""
-        return (3 * level**2) + (3 * level) + 105
+        return self.curve.get_required(level)
 
     async def get_rank(self, pool: asyncpg.Pool) -> int:
-        data = await pool.fetchrow(
-            """
-            SELECT * FROM ( 
-                SELECT user_id, guild_id, row_number() OVER (ORDER BY experience DESC) AS rank 
-                FROM levels
-                WHERE guild_id = $2
-            ) AS x 
-            WHERE user_id = $1 AND guild_id = $2
-            """,
-            self.user_id,
-            self.guild_id,
-        )
+        if (ranking := database.Manager.rankings.get(self.guild_id)) is not None:
+            return ranking.rank(self.user_id, self.experience)
+
+        # Index the guild for subsequent lookups and fall back to the database meanwhile.
+        database.Manager.rankings.load(pool, self.guild_id, database.Manager.buffer)
+
+        if (data := await fetchrow(pool, "get_rank", self.user_id, self.guild_id)) is None:
+            # Members without a row yet are ranked last
+            return await database.Manager.count_levels(self.guild_id) + 1
+
         return data["rank"]
 
+    async def award(self, pool: asyncpg.Pool, messages: int, experience: int) -> AwardRecord:
+        """
+        Atomically increments the messages and experience of a user in a single statement.
+        Returns the totals before and after the increment.
+        """
+        record: AwardRecord = await fetchrow(pool, "award", self.user_id, self.guild_id, messages, experience)
+
+        self.messages = record["messages"]
+        self.experience = record["experience"]
+
+        database.Manager.store(self)
+        return record
+
     async def set_experience(self, pool: asyncpg.Pool, experience: int) -> None:
-        record: LevelRecord = await pool.fetchrow(
-            "UPDATE levels SET experience = $1 WHERE user_id = $2 AND guild_id = $3 RETURNING experience",
-            experience,
-            self.user_id,
-            self.guild_id,
-        )
+        buffer = database.Manager.buffer
+
+        with buffer.watch(self.guild_id) as watched:
+            # A delta being flushed can't be dropped anymore, it has to be written before the overwrite.
+            while self.user_id in watched:
+                watched.discard(self.user_id)
+                await buffer.wait_flushed()
+
+            buffer.discard_experience(self.user_id, self.guild_id)
+            record: LevelRecord = await fetchrow(pool, "set_experience", experience, self.user_id, self.guild_id)
+
+            # Experience awarded meanwhile started being flushed, it's written either before or after the overwrite.
+            while self.user_id in watched:
+                watched.discard(self.user_id)
+                await buffer.wait_flushed()
+                record = await fetchrow(pool, "select_level_config", self.user_id, self.guild_id)
 
         self.experience = record["experience"]
 
-        database.Manager.levels_cache[int(str(self.user_id) + str(self.guild_id))] = self
+        if delta := buffer.pending.get((self.user_id, self.guild_id)):
+            self.experience += delta[1]
+
+        database.Manager.store(self)
 
     async def set_messages(self, pool: asyncpg.Pool, messages: int) -> None:
-        record: LevelRecord = await pool.fetchrow(
-            "UPDATE levels SET messages = $1 WHERE user_id = $2 AND guild_id = $3 RETURNING messages",
-            messages,
-            self.user_id,
-            self.guild_id,
-        )
+        record: LevelRecord = await fetchrow(pool, "set_messages", messages, self.user_id, self.guild_id)
 
         self.messages = record["messages"]
 
-        database.Manager.levels_cache[int(str(self.user_id) + str(self.guild_id))] = self
+        database.Manager.store(self)
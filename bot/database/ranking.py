@@ -0,0 +1,145 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from bisect import bisect_left, insort
+from typing import TYPE_CHECKING, Iterable
+
+import asyncpg
+
+if TYPE_CHECKING:
+    from .buffer import ExperienceBuffer
+
+__log__ = logging.getLogger(__name__)
+
+
+class GuildRanking:
+    """
+    Represents an in-memory ranking of a guild. Members are kept sorted in the same order
+    as the ``levels`` table ordered by ``experience DESC, user_id DESC`` so that the rank
+    of a member is found with a binary search.
+
+    Parameters
+    ----------
+    records: Iterable[tuple[:class:`int`, :class:`int`]]
+        The user ID and total experience of every member of the guild.
+    """
+
+    def __init__(self, records: Iterable[tuple[int, int]]) -> None:
+        self.experience: dict[int, int] = dict(records)
+        self.keys = sorted((-experience, -user_id) for user_id, experience in self.experience.items())
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def update(self, user_id: int, experience: int) -> None:
+        if (previous := self.experience.get(user_id)) is not None:
+            if previous == experience:
+                return
+            del self.keys[bisect_left(self.keys, (-previous, -user_id))]
+
+        insort(self.keys, (-experience, -user_id))
+        self.experience[user_id] = experience
+
+    def rank(self, user_id: int, experience: int) -> int:
+        """Returns the rank a member with a certain amount of experience has in this guild."""
+        return bisect_left(self.keys, (-experience, -user_id)) + 1
+
+
+class RankingIndex:
+    """
+    Represents the registry of guild rankings. Rankings are loaded lazily from the
+    database and updated incrementally on every experience change afterwards.
+    """
+
+    def __init__(self) -> None:
+        self.guilds: dict[int, GuildRanking] = {}
+
+        self._loading: dict[int, asyncio.Task] = {}
+        self._missed: dict[int, dict[int, int]] = {}
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """:class:`dict` The amount of indexed guilds and members."""
+        return {
+            "guilds": len(self.guilds),
+            "members": sum(len(ranking) for ranking in self.guilds.values()),
+            "loading": len(self._loading),
+        }
+
+    def get(self, guild_id: int) -> GuildRanking | None:
+        return self.guilds.get(guild_id)
+
+    def update(self, guild_id: int, user_id: int, experience: int) -> None:
+        if (ranking := self.guilds.get(guild_id)) is not None:
+            ranking.update(user_id, experience)
+        elif guild_id in self._missed:
+            # Changes made while the ranking is loading are replayed once it's done.
+            self._missed[guild_id][user_id] = experience
+
+    async def _fetch(self, pool: asyncpg.Pool, guild_id: int, buffer: ExperienceBuffer | None) -> dict[int, int]:
+        query = "SELECT user_id, experience FROM levels WHERE guild_id = $1"
+
+        if buffer is None:
+            return dict(await pool.fetch(query, guild_id))
+
+        with buffer.watch(guild_id) as watched:
+            experience: dict[int, int] = dict(await pool.fetch(query, guild_id))
+
+            # The rows of members whose deltas were being flushed meanwhile are read again once it's done.
+            while watched:
+                user_ids = list(watched)
+                watched.clear()
+
+                await buffer.wait_flushed()
+                experience.update(await pool.fetch(f"{query} AND user_id = ANY($2::BIGINT[])", guild_id, user_ids))
+
+        for (user_id, delta_guild_id), (_, delta) in buffer.pending.items():
+            if delta_guild_id == guild_id:
+                experience[user_id] = experience.get(user_id, 0) + delta
+
+        return experience
+
+    def load(self, pool: asyncpg.Pool, guild_id: int, buffer: ExperienceBuffer | None = None) -> asyncio.Task:
+        """
+        Schedules the ranking of a guild to be loaded, returns the existing task if it's already loading.
+        Deltas which are still pending in the buffer are added on top of the stored experience.
+        """
+        if (task := self._loading.get(guild_id)) is None:
+            self._missed[guild_id] = {}
+            task = self._loading[guild_id] = asyncio.create_task(self._load(pool, guild_id, buffer))
+
+        return task
+
+    async def _load(self, pool: asyncpg.Pool, guild_id: int, buffer: ExperienceBuffer | None) -> None:
+        try:
+            experience = await self._fetch(pool, guild_id, buffer)
+        except Exception as exc:
+            __log__.error(f"Failed to load the ranking of guild {guild_id}.", exc_info=exc)
+        else:
+            ranking = GuildRanking(experience.items())
+
+            for user_id, experience in self._missed[guild_id].items():
+                ranking.update(user_id, experience)
+
+            self.guilds[guild_id] = ranking
+        finally:
+            del self._loading[guild_id]
+            del self._missed[guild_id]
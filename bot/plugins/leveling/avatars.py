@@ -0,0 +1,188 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Awaitable, Callable
+
+import discord
+from PIL import Image
+
+from bot import LRUCache
+
+from .render import get_dominant_color
+
+__log__ = logging.getLogger(__name__)
+
+AVATAR_SIZE = (184, 184)
+AVATAR_BYTES = AVATAR_SIZE[0] * AVATAR_SIZE[1] * 4
+
+# The smallest size the CDN serves which is still larger than the size avatars are rendered at.
+FETCH_SIZE = 256
+
+
+def decode_avatar(data: bytes) -> tuple[bytes, tuple[int, int, int]]:
+    """Decodes an avatar and returns its pixels resized for the rank card as raw RGBA along with its dominant colour."""
+    with Image.open(BytesIO(data)) as image:
+        with image.convert("RGBA") as converted:
+            with converted.resize(AVATAR_SIZE, Image.BOX) as resized:
+                return resized.tobytes(), get_dominant_color(resized)
+
+
+def get_avatar_color(pixels: bytes) -> tuple[int, int, int]:
+    with Image.frombytes("RGBA", AVATAR_SIZE, pixels) as image:
+        return get_dominant_color(image)
+
+
+class AvatarCache:
+    """
+    Represents a cache of avatars keyed by their hash. Avatars are fetched from the CDN at the
+    size the rank card needs and stored already decoded and resized, optionally spilling the
+    least recently used avatars to disk once the memory limit is reached. The dominant colour
+    of each avatar is memoized separately since it's far smaller than the avatar itself.
+
+    Disk access happens on a single thread so that an avatar is always written before it's read
+    or removed, and evictions never block the event loop.
+
+    Parameters
+    ----------
+    max_memory: :class:`float`, default=32
+        The maximum memory in MiB used by avatars kept in memory.
+    spill: :class:`str`, default=""
+        The directory avatars are spilled to. If empty then evicted avatars are discarded.
+    max_disk: :class:`float`, default=256
+        The maximum disk space in MiB used by spilled avatars.
+    fetch: Callable[[:class:`str`], Awaitable[:class:`bytes`]] | ``None``, default=None
+        A function fetching an avatar from its URL, used to replace the CDN. Uses the client's HTTP session if ``None``.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_memory: float = 32,
+        spill: str = "",
+        max_disk: float = 256,
+        fetch: Callable[[str], Awaitable[bytes]] | None = None,
+    ) -> None:
+        self.spill = spill
+        self.fetch = fetch
+
+        self.memory: LRUCache[str, bytes] = LRUCache(
+            int(max_memory * 1024**2) // AVATAR_BYTES, on_evict=self._spill if spill else None
+        )
+        self.disk: LRUCache[str, str] = LRUCache(int(max_disk * 1024**2) // AVATAR_BYTES, on_evict=self._remove)
+        self.colors: LRUCache[str, tuple[int, int, int]] = LRUCache(65536)
+
+        self.fetches = 0
+        self.disk_hits = 0
+
+        self._io = ThreadPoolExecutor(1, thread_name_prefix="avatars")
+
+        if spill:
+            os.makedirs(spill, exist_ok=True)
+
+    @property
+    def stats(self) -> dict[str, int | float]:
+        """:class:`dict` The size and hit counters of this cache."""
+        return {
+            **self.memory.stats,
+            "disk_size": len(self.disk),
+            "disk_hits": self.disk_hits,
+            "fetches": self.fetches,
+            "colors": len(self.colors),
+        }
+
+    def _spill(self, key: str, data: bytes) -> None:
+        path = os.path.join(self.spill, f"{key}.rgba")
+
+        # Registered right away, reading it before the write failed finds no file and fetches the avatar again.
+        self.disk[key] = path
+        self._io.submit(self._write, key, path, data)
+
+    def _write(self, key: str, path: str, data: bytes) -> None:
+        try:
+            with open(path, "wb") as f:
+                f.write(data)
+        except OSError as exc:
+            __log__.warning(f"Failed to spill avatar '{key}' to disk.", exc_info=exc)
+
+    def _remove(self, key: str, path: str) -> None:
+        self._io.submit(self._delete, path)
+
+    def _delete(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _load(self, path: str) -> bytes | None:
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    async def get(self, asset: discord.Asset) -> tuple[bytes, tuple[int, int, int]]:
+        """Returns the pixels of an avatar resized for the rank card as raw RGBA along with its dominant colour."""
+        if (data := self.memory.get(asset.key)) is not None:
+            if (color := self.colors.get(asset.key)) is None:
+                color = self.colors[asset.key] = await asyncio.to_thread(get_avatar_color, data)
+
+            return data, color
+
+        if (path := self.disk.pop(asset.key)) is not None:
+            data = await asyncio.get_running_loop().run_in_executor(self._io, self._load, path)
+            self._remove(asset.key, path)
+
+            if data is not None and len(data) == AVATAR_BYTES:
+                self.disk_hits += 1
+                self.memory[asset.key] = data
+
+                if (color := self.colors.get(asset.key)) is None:
+                    color = self.colors[asset.key] = await asyncio.to_thread(get_avatar_color, data)
+
+                return data, color
+
+        asset = asset.replace(size=FETCH_SIZE, format="png")
+        self.fetches += 1
+
+        raw = await (self.fetch(asset.url) if self.fetch is not None else asset.read())
+        data, color = await asyncio.to_thread(decode_avatar, raw)
+
+        self.memory[asset.key] = data
+        self.colors[asset.key] = color
+
+        return data, color
+
+    async def get_many(self, assets: list[discord.Asset], concurrency: int = 4) -> list[tuple[bytes, tuple[int, int, int]]]:
+        """Returns multiple avatars, fetching at most ``concurrency`` of them from the CDN at once."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def get(asset: discord.Asset) -> tuple[bytes, tuple[int, int, int]]:
+            async with semaphore:
+                return await self.get(asset)
+
+        return await asyncio.gather(*(get(asset) for asset in assets))
+
+    def close(self) -> None:
+        """Stops the disk thread once the queued writes and removals are done."""
+        self._io.shutdown(wait=False)
@@ -0,0 +1,106 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import math
+import time
+
+
+class CooldownWheel:
+    """
+    Represents a per member cooldown which only stores the time of the last award of each
+    member. Entries are expired by a hashed timing wheel, so memory follows the members who
+    were active within the last period rather than every member who has ever chatted.
+
+    Parameters
+    ----------
+    per: :class:`float`
+        The cooldown in seconds.
+    resolution: :class:`float`, default=1.0
+        The width in seconds of a slot of the wheel.
+    """
+
+    def __init__(self, per: float, *, resolution: float = 1.0) -> None:
+        self.per = per
+        self.resolution = resolution
+
+        self.last: dict[int, float] = {}
+        self.slots: list[set[int]] = [set() for _ in range(math.ceil(per / resolution) + 1)]
+
+        self.sweeps = 0
+        self.expired = 0
+        self.last_sweep_duration = 0.0
+
+        self._tick = int(time.monotonic() / resolution)
+
+    def __len__(self) -> int:
+        return len(self.last)
+
+    @property
+    def stats(self) -> dict[str, int | float]:
+        """:class:`dict` The size and sweep counters of this cooldown."""
+        return {
+            "size": len(self.last),
+            "sweeps": self.sweeps,
+            "expired": self.expired,
+            "last_sweep_duration": self.last_sweep_duration,
+        }
+
+    def _slot(self, timestamp: float) -> set[int]:
+        return self.slots[int(timestamp / self.resolution) % len(self.slots)]
+
+    def update_rate_limit(self, guild_id: int, member_id: int, now: float | None = None) -> float:
+        """Returns the time left on the cooldown of a member, otherwise starts their cooldown and returns ``0``."""
+        now = time.monotonic() if now is None else now
+        key = (guild_id << 64) | member_id
+
+        if (last := self.last.get(key)) is not None:
+            if (retry_after := last + self.per - now) > 0:
+                return retry_after
+            self._slot(last + self.per).discard(key)
+
+        self.last[key] = now
+        self._slot(now + self.per).add(key)
+
+        return 0.0
+
+    def sweep(self, now: float | None = None) -> int:
+        """Expires the entries of every slot which has fully elapsed since the last sweep."""
+        start = time.perf_counter()
+        now = time.monotonic() if now is None else now
+
+        # Only slots which ended before now are swept. Entries are still checked individually
+        # since a slot can hold entries of a later rotation if sweeps fell behind.
+        current = int(now / self.resolution)
+        ticks = range(max(self._tick, current - len(self.slots)), current)
+        self._tick = current
+
+        expired = 0
+        for tick in ticks:
+            slot = self.slots[tick % len(self.slots)]
+
+            for key in [key for key in slot if self.last[key] + self.per <= now]:
+                del self.last[key]
+                slot.discard(key)
+                expired += 1
+
+        self.sweeps += 1
+        self.expired += expired
+        self.last_sweep_duration = time.perf_counter() - start
+
+        return expired
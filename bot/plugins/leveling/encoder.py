@@ -0,0 +1,73 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from io import BytesIO
+
+from PIL import Image
+
+FORMATS = ("png", "webp", "palette")
+
+
+@dataclass(frozen=True)
+class Encoder:
+    """
+    Represents the settings rendered cards are encoded with.
+
+    Attributes
+    ----------
+    format: :class:`str`, default="png"
+        Either ``png``, ``webp`` or ``palette`` for a PNG quantized to a palette.
+    compress_level: :class:`int`, default=6
+        The zlib compression level of PNGs, from 0 (fastest) to 9 (smallest).
+    lossless: :class:`bool`, default=False
+        Whether or not WebP images are encoded losslessly.
+    quality: :class:`int`, default=90
+        The quality of lossy WebP images, or the effort spent on lossless ones.
+    colors: :class:`int`, default=256
+        The amount of colours of palette PNGs.
+    """
+
+    format: str = "png"
+    compress_level: int = 6
+    lossless: bool = False
+    quality: int = 90
+    colors: int = 256
+
+    def __post_init__(self) -> None:
+        if self.format not in FORMATS:
+            raise ValueError(f"Unknown encoder format '{self.format}', expected one of {', '.join(FORMATS)}.")
+
+    @property
+    def extension(self) -> str:
+        return "webp" if self.format == "webp" else "png"
+
+    def encode(self, image: Image.Image) -> bytes:
+        buffer = BytesIO()
+
+        if self.format == "webp":
+            image.save(buffer, "webp", lossless=self.lossless, quality=self.quality, method=4)
+        elif self.format == "palette":
+            with image.convert("RGB") as converted:
+                with converted.quantize(self.colors, method=Image.FASTOCTREE) as paletted:
+                    paletted.save(buffer, "png", compress_level=self.compress_level)
+        else:
+            image.save(buffer, "png", compress_level=self.compress_level)
+
+        return buffer.getvalue()
@@ -0,0 +1,176 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+
+import discord
+
+from bot import LevelConfig, LevelRecord, Manager, Paginator
+
+
+class Leaderboard(Paginator):
+    """
+    A paginator over the leaderboard of a guild. Pages are fetched from the database by
+    keyset only when they are shown, and the page after the one being shown is prefetched.
+
+    Attributes
+    ----------
+    interaction: :class:`discord.Interaction`
+        The app command interaction.
+    total: :class:`int`
+        The amount of members on the leaderboard.
+    per_page: :class:`int`
+        The number of members shown per page.
+    """
+
+    def __init__(self, interaction: discord.Interaction, total: int, *, per_page: int = 10) -> None:
+        assert interaction.guild is not None
+
+        self.guild_id = interaction.guild.id
+        self.total = total
+
+        self._cache: dict[int, list[LevelRecord]] = {}
+        self._fetching: dict[int, asyncio.Task[list[LevelRecord]]] = {}
+
+        super().__init__(interaction, [], per_page=per_page)
+
+    def _fill_items(self) -> None:
+        super()._fill_items()
+
+        self.remove_item(self.stop_paginator)
+        self.add_item(self.around_me)
+        self.add_item(self.stop_paginator)
+
+    @property
+    def is_paginating(self) -> bool:
+        return self.total > self.per_page
+
+    @property
+    def max_pages(self) -> int:
+        return max(math.ceil(self.total / self.per_page), 1)
+
+    async def _fetch_page(self, page_number: int) -> list[LevelRecord]:
+        if (records := Manager.leaderboards.get(self.guild_id, page_number)) is not None:
+            return records
+
+        if page_number == 0:
+            records = await Manager.fetch_leaderboard(self.guild_id, self.per_page)
+        elif (previous := self._cache.get(page_number - 1)) is not None:
+            after = (previous[-1]["experience"], previous[-1]["user_id"])
+            records = await Manager.fetch_leaderboard(self.guild_id, self.per_page, after=after)
+        elif (following := self._cache.get(page_number + 1)) is not None:
+            before = (following[0]["experience"], following[0]["user_id"])
+            records = await Manager.fetch_leaderboard(self.guild_id, self.per_page, before=before)
+        else:
+            limit = self.total - (self.max_pages - 1) * self.per_page
+            records = await Manager.fetch_leaderboard(self.guild_id, limit, last=True)
+
+        Manager.leaderboards.set(self.guild_id, page_number, records)
+        return records
+
+    async def get_page(self, page_number: int) -> list[LevelRecord]:
+        if (records := self._cache.get(page_number)) is None:
+            if (task := self._fetching.get(page_number)) is None:
+                task = self._fetching[page_number] = asyncio.create_task(self._fetch_page(page_number))
+
+            try:
+                records = self._cache[page_number] = await task
+            finally:
+                self._fetching.pop(page_number, None)
+
+        self._prefetch(page_number + 1)
+        return records
+
+    def _prefetch(self, page_number: int) -> None:
+        if page_number >= self.max_pages or page_number in self._cache or page_number in self._fetching:
+            return
+
+        async def prefetch() -> list[LevelRecord]:
+            try:
+                records = self._cache[page_number] = await self._fetch_page(page_number)
+                return records
+            finally:
+                self._fetching.pop(page_number, None)
+
+        self._fetching[page_number] = asyncio.create_task(prefetch())
+
+    async def format_page(self, entries: list[LevelRecord]) -> discord.Embed:
+        assert self.interaction.guild is not None
+
+        embed = discord.Embed(title=f"Leaderboard for {self.interaction.guild.name}", color=discord.Color.blurple())
+
+        start = self._current_page * self.per_page
+        levels = LevelConfig.curve.levels(record["experience"] for record in entries)
+
+        embed.description = "\n".join(
+            f"**#{start + index + 1}** <@{record['user_id']}> \N{EM DASH} Level {level} ({record['experience']:,} XP)"
+            for index, (record, level) in enumerate(zip(entries, levels))
+        )
+        embed.set_footer(text=f"Page {self.current_page}/{self.max_pages}")
+
+        return embed
+
+    async def jump_to(self, level_config: LevelConfig) -> int:
+        """Builds the page containing a member from their key and returns its page number."""
+        rank = await level_config.get_rank(Manager.pool)
+        page_number, index = divmod(rank - 1, self.per_page)
+
+        if page_number not in self._cache:
+            user_id = level_config.user_id
+            key = (level_config.experience, user_id)
+
+            # The key includes buffered experience, so the stored row of the member could be on either side.
+            before = await Manager.fetch_leaderboard(self.guild_id, index, before=key, exclude=user_id) if index else []
+            after = await Manager.fetch_leaderboard(self.guild_id, self.per_page - index - 1, after=key, exclude=user_id)
+
+            member: LevelRecord = {
+                "user_id": level_config.user_id,
+                "guild_id": level_config.guild_id,
+                "messages": level_config.messages,
+                "experience": level_config.experience,
+            }
+            self._cache[page_number] = [*before, member, *after]
+
+        self._current_page = min(page_number, self.max_pages - 1)
+        return self._current_page
+
+    @discord.ui.button(label="Around Me", style=discord.ButtonStyle.green)
+    async def around_me(self, interaction: discord.Interaction, _) -> None:
+        level_config = await Manager.get_level_config(interaction.user.id, self.guild_id, create=False)
+        await self.jump_to(level_config)
+
+        await self._show_page(interaction)
+
+    @classmethod
+    async def open(cls, interaction: discord.Interaction, total: int, *, around_me: bool = False) -> Leaderboard:
+        assert interaction.guild is not None
+
+        paginator = cls(interaction, total)
+
+        if around_me:
+            level_config = await Manager.get_level_config(interaction.user.id, interaction.guild.id, create=False)
+            await paginator.jump_to(level_config)
+
+        entries = await paginator.get_page(paginator._current_page)
+        embed = await paginator.format_page(entries=entries)
+        paginator._update_labels(paginator._current_page)
+
+        await interaction.followup.send(embed=embed, view=paginator)
+        return paginator
@@ -15,22 +15,52 @@ GNU Affero General Public License for more details.
 You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+import asyncio
+import dataclasses
 import random
+from io import BytesIO
 
 import discord
 from discord import app_commands as app
-from discord.ext import commands
+from discord.ext import tasks
 
-from bot import Manager, MessageError, Plugin, Winston
+from bot import LevelConfig, Manager, MessageError, Plugin, Winston, config
 
-from .render import render
+from .avatars import AvatarCache
+from .cooldown import CooldownWheel
+from .encoder import Encoder
+from .leaderboard import Leaderboard
+from .pool import RenderPool
+from .render import render, render_leaderboard
 
 
 class Leveling(Plugin):
     def __init__(self, bot: Winston) -> None:
         super().__init__(bot)
 
-        self.message_cooldown = commands.CooldownMapping.from_cooldown(1, 60, commands.BucketType.member)
+        self.message_cooldown = CooldownWheel(60)
+        self.render_pool = RenderPool(**config.RENDER)
+        self.avatars = AvatarCache(**config.AVATARS)
+
+        settings = dict(config.ENCODER)
+        guilds = settings.pop("guilds", {})
+
+        self.encoder = Encoder(**settings)
+        self.guild_encoders = {
+            int(guild_id): dataclasses.replace(self.encoder, **overrides) for guild_id, overrides in guilds.items()
+        }
+
+    async def cog_load(self) -> None:
+        self.sweep_cooldowns.start()
+
+    async def cog_unload(self) -> None:
+        self.sweep_cooldowns.cancel()
+        self.render_pool.close()
+        self.avatars.close()
+
+    @tasks.loop(seconds=1)
+    async def sweep_cooldowns(self) -> None:
+        self.message_cooldown.sweep()
 
     @Plugin.listener()
     async def on_message(self, message: discord.Message) -> None:
@@ -46,23 +76,14 @@ class Leveling(Plugin):
         if len(message.content) <= 3:
             return
 
-        bucket = self.message_cooldown.get_bucket(message)
-        retry_after = bucket.update_rate_limit()
-
         # You are on cooldown
-        if retry_after:
+        if self.message_cooldown.update_rate_limit(message.guild.id, message.author.id):
             return
 
-        level_config = await Manager.get_level_config(message.author.id, message.guild.id)
-        await level_config.set_messages(Manager.pool, level_config.messages + 1)
+        level_config = await Manager.get_level_config(message.author.id, message.guild.id, create=False)
+        previous = await Manager.award(level_config, messages=1, experience=random.randint(7, 13))
 
-        experience = level_config.experience + random.randint(7, 13)
-        leveled_up = experience - level_config.get_experience(level_config.level) >= level_config.get_required(
-            level_config.level
-        )
-        await level_config.set_experience(Manager.pool, experience)
-
-        if leveled_up:
+        if level_config.level > level_config.get_level(previous):
             await message.reply(f"Congratulations {message.author.mention}! You leveled up to level {level_config.level}!")
 
     @app.command()
@@ -77,19 +98,66 @@ class Leveling(Plugin):
 
         await interaction.response.defer()
 
-        level_config = await Manager.get_level_config(member.id, member.guild.id)
+        level_config = await Manager.get_level_config(member.id, member.guild.id, create=False)
+        await self.bot.hydrate(member.guild)
+
+        avatar, color = await self.avatars.get(member.display_avatar)
+        encoder = self.guild_encoders.get(member.guild.id, self.encoder)
 
-        card = await render(
-            await member.display_avatar.read(),
-            member,
+        card = await self.render_pool.run(
+            render,
+            avatar,
+            color,
+            member.nick or member.name,
+            str(member),
             level_config.level,
             level_config.experience - level_config.get_experience(level_config.level),
             level_config.get_required(level_config.level),
             await level_config.get_rank(Manager.pool),
-            sum(not member.bot for member in interaction.guild.members),
+            self.bot.stats.get(member.guild).humans,
             level_config.messages,
+            encoder,
         )
-        await interaction.followup.send(file=card)
+        await interaction.followup.send(file=discord.File(BytesIO(card), filename=f"rank.{encoder.extension}"))
+
+    @app.command()
+    @app.describe(around_me="Whether to open the leaderboard on the page you are on.")
+    @app.describe(image="Whether to show the top 10 members as an image instead.")
+    async def leaderboard(self, interaction: discord.Interaction, around_me: bool = False, image: bool = False) -> None:
+        """View the members with the most experience in this server."""
+        assert interaction.guild is not None
+
+        if not (total := await Manager.count_levels(interaction.guild.id)):
+            raise MessageError("Nobody has earned any experience in this server yet.")
+
+        await interaction.response.defer()
+
+        if not image:
+            await Leaderboard.open(interaction, total, around_me=around_me)
+            return
+
+        if (records := Manager.leaderboards.get(interaction.guild.id, 0)) is None:
+            records = await Manager.fetch_leaderboard(interaction.guild.id, 10)
+            Manager.leaderboards.set(interaction.guild.id, 0, records)
+
+        members = await asyncio.gather(
+            *(self.bot.get_or_fetch_member(interaction.guild, record["user_id"]) for record in records)
+        )
+        avatars = iter(await self.avatars.get_many([member.display_avatar for member in members if member is not None]))
+
+        rows = []
+        levels = LevelConfig.curve.levels(record["experience"] for record in records)
+
+        for rank, (record, member, level) in enumerate(zip(records, members, levels), start=1):
+            avatar, color = next(avatars) if member is not None else (None, (88, 101, 242))
+            name = member.display_name if member is not None else f"Unknown User ({record['user_id']})"
+
+            rows.append((avatar, color, name, rank, level, record["experience"]))
+
+        encoder = self.guild_encoders.get(interaction.guild.id, self.encoder)
+        card = await self.render_pool.run(render_leaderboard, rows, encoder)
+
+        await interaction.followup.send(file=discord.File(BytesIO(card), filename=f"leaderboard.{encoder.extension}"))
 
     @app.command()
     @app.default_permissions(administrator=True)
@@ -114,7 +182,7 @@ class Leveling(Plugin):
         if level is not None and xp is not None:
             xp = None
 
-        level_config = await Manager.get_level_config(target.id, target.guild.id)
+        level_config = await Manager.get_level_config(target.id, target.guild.id, create=False)
 
         experience = 0
         if level:
@@ -0,0 +1,108 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from bot import MessageError
+
+from . import render
+
+__log__ = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class RenderPool:
+    """
+    Represents the pool rank cards are rendered in. Jobs only take plain data so that they
+    can be sent to worker processes, which load the fonts and assets once when they start.
+
+    Parameters
+    ----------
+    workers: :class:`int`, default=0
+        The amount of worker processes. If ``0`` then jobs are rendered in a thread instead.
+    max_queue: :class:`int`, default=32
+        The maximum amount of jobs waiting or rendering at once, further jobs are rejected.
+    """
+
+    def __init__(self, *, workers: int = 0, max_queue: int = 32) -> None:
+        self.workers = workers
+        self.max_queue = max_queue
+
+        self.executor = self._create_executor()
+
+        self.queued = 0
+        self.rejected = 0
+        self.restarts = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """:class:`dict` The size, queue and restart counters of this pool."""
+        return {"workers": self.workers, "queued": self.queued, "rejected": self.rejected, "restarts": self.restarts}
+
+    def _create_executor(self) -> Executor:
+        if self.workers:
+            return ProcessPoolExecutor(self.workers, initializer=render.preload)
+
+        return ThreadPoolExecutor(thread_name_prefix="render", initializer=render.preload)
+
+    def _restart(self, broken: Executor) -> None:
+        # Every job running on the broken executor fails at once, only the first one replaces it.
+        if broken is not self.executor:
+            return
+
+        __log__.warning("The render pool is broken, restarting it.")
+        broken.shutdown(wait=False, cancel_futures=True)
+
+        self.executor = self._create_executor()
+        self.restarts += 1
+
+    async def run(self, function: Callable[..., T], *args: Any) -> T:
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise MessageError("Too many cards are being rendered right now, please try again in a moment.")
+
+        loop = asyncio.get_running_loop()
+        job = functools.partial(function, *args)
+
+        self.queued += 1
+        try:
+            retried = False
+
+            while True:
+                executor = self.executor
+
+                try:
+                    return await loop.run_in_executor(executor, job)
+                except BrokenExecutor:
+                    # A worker died, e.g. it was killed by the OOM killer, the job is retried once on a new pool.
+                    self._restart(executor)
+
+                    if retried:
+                        raise
+                    retried = True
+        finally:
+            self.queued -= 1
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -15,29 +15,59 @@ GNU Affero General Public License for more details.
 You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
-import time
-from io import BytesIO
+from functools import lru_cache
 
-import discord
-from jishaku.functools import executor_function
 from PIL import Image, ImageChops, ImageDraw, ImageFont
 
 from bot import shorten_number
 
-INTER_BOLD_48 = ImageFont.truetype("./assets/Inter-Bold.ttf", 48)
-INTER_BOLD_36 = ImageFont.truetype("./assets/Inter-Bold.ttf", 36)
-INTER_BOLD_28 = ImageFont.truetype("./assets/Inter-Bold.ttf", 28)
-INTER_BOLD_22 = ImageFont.truetype("./assets/Inter-Bold.ttf", 22)
-INTER_MEDIUM_32 = ImageFont.truetype("./assets/Inter-Medium.ttf", 32)
-INTER_MEDIUM_28 = ImageFont.truetype("./assets/Inter-Medium.ttf", 28)
-INTER_MEDIUM_24 = ImageFont.truetype("./assets/Inter-Medium.ttf", 24)
-INTER_MEDIUM_20 = ImageFont.truetype("./assets/Inter-Medium.ttf", 20)
+from .encoder import Encoder
 
-EXPERIENCE = {False: (INTER_BOLD_28, 16), True: (INTER_BOLD_22, 20)}
 
-STAR = Image.open("./assets/star.png")
-BUBBLE = Image.open("./assets/bubble.png")
-MASK = Image.open("./assets/mask.png").convert("L").resize((184, 184), Image.LANCZOS)
+@lru_cache(maxsize=None)
+def load_font(weight: str, size: int) -> ImageFont.FreeTypeFont:
+    """Loads a weight of the Inter font on first use rather than when the plugin is imported."""
+    return ImageFont.truetype(f"./assets/Inter-{weight}.ttf", size)
+
+
+@lru_cache(maxsize=None)
+def load_image(name: str) -> Image.Image:
+    """Loads an image from the assets on first use rather than when the plugin is imported."""
+    image = Image.open(f"./assets/{name}.png")
+    image.load()
+
+    return image
+
+
+@lru_cache(maxsize=1)
+def load_mask() -> Image.Image:
+    return load_image("mask").convert("L").resize((184, 184), Image.LANCZOS)
+
+
+FONTS = (
+    ("Bold", 48),
+    ("Bold", 36),
+    ("Bold", 28),
+    ("Bold", 22),
+    ("Medium", 32),
+    ("Medium", 28),
+    ("Medium", 24),
+    ("Medium", 20),
+)
+IMAGES = ("template", "star", "bubble", "mask")
+
+# Whether the experience text is too wide -> (size of the bold font, vertical offset)
+EXPERIENCE = {False: (28, 16), True: (22, 20)}
+
+# Accent colours are rounded to multiples of this step so that similar avatars share a cached layer.
+COLOR_STEP = 8
+
+PROGRESS_BAR_SIZE = (862, 44)
+PROGRESS_BAR_RADIUS = 10
+
+# The narrowest right end which, pasted after the start of the full width mask, gives the same pixels
+# as a mask built at the width of the bar, for every width the bar can have.
+PROGRESS_BAR_CAP = 11
 
 
 def add_corners(image: Image.Image, rad: int) -> Image.Image:
@@ -57,7 +87,9 @@ def add_corners(image: Image.Image, rad: int) -> Image.Image:
         return image
 
 
+@lru_cache(maxsize=64)
 def create_rounded_rectangle_mask(size: tuple[int, int], radius: int, alpha: int = 255) -> Image.Image:
+    """Returns a cached rounded rectangle mask, the returned image must not be modified."""
     factor = 5
     radius = radius * factor
     image = Image.new("RGBA", (size[0] * factor, size[1] * factor), (0, 0, 0, 0))
@@ -84,6 +116,7 @@ def create_rounded_rectangle_mask(size: tuple[int, int], radius: int, alpha: int
 def create_outlined_rounded_rectangle(
     size: tuple[int, int], radius: int, thickness: int, fill: tuple[int, int, int], outline: tuple[int, int, int]
 ) -> tuple[Image.Image, Image.Image]:
+    """Returns an outlined rounded rectangle and its cached mask, the returned mask must not be modified."""
     with Image.new("RGB", (size[0] + thickness, size[1] + thickness), outline) as outline_image:
         with Image.new("RGB", size, fill) as fill_image:
             outline_image.paste(fill_image, (thickness // 2, thickness // 2), create_rounded_rectangle_mask(size, radius))
@@ -91,18 +124,52 @@ def create_outlined_rounded_rectangle(
         return (outline_image, create_rounded_rectangle_mask(outline_image.size, radius + (thickness // 2)))
 
 
-def get_dominant_color(image: Image.Image, palette_size=16) -> tuple[int, int, int]:
-    img = image.copy()
-    img.thumbnail((100, 100))
+# Lookup table posterizing the colour bands to 4 bits and thresholding the alpha band.
+POSTERIZE = [value & 0xF0 for value in range(256)] * 3 + [255 if value >= 128 else 0 for value in range(256)]
 
-    paletted = img.convert("P", palette=Image.ADAPTIVE, colors=palette_size)
 
-    palette = paletted.getpalette()
-    color_counts = sorted(paletted.getcolors(), reverse=True)
-    palette_index = color_counts[0][1]
-    dominant_color = palette[palette_index * 3 : palette_index * 3 + 3]  # type: ignore
+def get_dominant_color(image: Image.Image, clusters: int = 8, iterations: int = 8) -> tuple[int, int, int]:
+    """
+    Returns the dominant colour of an image. Pixels are binned into a colour histogram in a
+    single pass over the downsampled image, ignoring transparent pixels, and the most common
+    bins are grouped with a weighted k-means. The centre of the heaviest cluster is returned.
+    """
+    with image.convert("RGBA") as img:
+        img.thumbnail((64, 64), Image.NEAREST)
 
-    return tuple(dominant_color)
+        with img.point(POSTERIZE) as posterized:
+            histogram = posterized.getcolors(64 * 64) or []
+
+    bins = [(count, (r + 8, g + 8, b + 8)) for count, (r, g, b, a) in histogram if a]
+    bins = sorted(bins or [(count, (r + 8, g + 8, b + 8)) for count, (r, g, b, _) in histogram], reverse=True)[:64]
+
+    centroids = [color for _, color in bins[:clusters]]
+    weights = [0] * len(centroids)
+
+    for _ in range(iterations):
+        sums = [[0, 0, 0] for _ in centroids]
+        weights = [0] * len(centroids)
+
+        for count, (r, g, b) in bins:
+            index = min(
+                range(len(centroids)),
+                key=lambda i: (r - centroids[i][0]) ** 2 + (g - centroids[i][1]) ** 2 + (b - centroids[i][2]) ** 2,
+            )
+            sums[index][0] += r * count
+            sums[index][1] += g * count
+            sums[index][2] += b * count
+            weights[index] += count
+
+        updated = [
+            (round(s[0] / w), round(s[1] / w), round(s[2] / w)) if w else centroid
+            for s, w, centroid in zip(sums, weights, centroids)
+        ]
+
+        if updated == centroids:
+            break
+        centroids = updated
+
+    return max(zip(weights, centroids))[1]
 
 
 def get_color_alpha(
@@ -115,133 +182,307 @@ def get_color_alpha(
     return tuple(color)
 
 
-@executor_function
-def render(
-    avatar: bytes, user: discord.Member, level: int, current: int, required: int, rank: int, members: int, messages: int
-) -> discord.File:
-    with Image.open("./assets/template.png") as template:
-        # User Avatar
-        with Image.open(BytesIO(avatar)).resize((184, 184), Image.BOX) as image:
-            color = get_dominant_color(image)
-            mask = ImageChops.darker(MASK, image.split()[-1])
-
-            avatar_bg, avatar_bg_mask = create_outlined_rounded_rectangle(
-                (192, 192), 44, 4, (57, 62, 70), get_color_alpha(color, 0.6)
-            )
-            template.paste(avatar_bg, (38, 38), avatar_bg_mask)
+def quantize_color(color: tuple[int, int, int]) -> tuple[int, int, int]:
+    return tuple(min(value - value % COLOR_STEP + COLOR_STEP // 2, 255) for value in color)  # type: ignore
 
-            avatar_bg.close()
-            avatar_bg_mask.close()
 
-            template.paste(image, (44, 44), mask)
-            mask.close()
+@lru_cache(maxsize=128)
+def create_base_layer(color: tuple[int, int, int]) -> Image.Image:
+    """
+    Returns the template with every shape depending on the accent colour already pasted,
+    leaving only the avatar, the progress and the text to be drawn per render.
+    """
+    template = load_image("template").copy()
 
-        draw = ImageDraw.Draw(template)
+    shapes = (
+        ((192, 192), 44, 4, (57, 62, 70), get_color_alpha(color, 0.6), (38, 38)),
+        ((862, 44), 10, 4, get_color_alpha(color, 0.3), color, (252, 162)),
+        ((192, 60), 20, 4, (57, 62, 70), get_color_alpha(color, 0.5), (38, 254)),
+        ((260, 60), 20, 4, (57, 62, 70), get_color_alpha(color, 0.5), (252, 254)),
+        ((268, 60), 20, 4, (57, 62, 70), get_color_alpha(color, 0.5), (846, 256)),
+    )
 
-        # User Name
-        draw.text((252, 62), user.nick or user.name, font=INTER_BOLD_48, fill=(235, 235, 235))
-        draw.text((252, 114), str(user), font=INTER_MEDIUM_28, fill=get_color_alpha((216, 216, 216), 0.8))
-
-        # Rank
-        rank_text = f"Rank #{rank}"
-        width = INTER_BOLD_48.getlength(rank_text)
-        draw.text((1114 - width, 62), text=rank_text, font=INTER_BOLD_48, fill=(235, 235, 235))
+    for size, radius, thickness, fill, outline, position in shapes:
+        image, mask = create_outlined_rounded_rectangle(size, radius, thickness, fill, outline)
+        template.paste(image, position, mask)
+        image.close()
 
-        members_text = f"Out Of {shorten_number(members)}"
-        width = INTER_MEDIUM_28.getlength(members_text)
-        draw.text(
-            (1114 - width, 114),
-            members_text,
-            font=INTER_MEDIUM_28,
-            fill=get_color_alpha((216, 216, 216), 0.8),
-        )
+    return template
 
-        # Progress Bar
-        empty_bar, empty_bar_mask = create_outlined_rounded_rectangle(
-            (862, 44), radius=10, thickness=4, fill=get_color_alpha(color, 0.3), outline=color
-        )
-        template.paste(empty_bar, (252, 162), empty_bar_mask)
 
-        empty_bar.close()
-        empty_bar_mask.close()
+@lru_cache(maxsize=4096)
+def get_text_length(font: ImageFont.FreeTypeFont, text: str) -> float:
+    """Returns the width of a text in a font, the same strings repeat across most cards."""
+    return font.getlength(text)
 
-        if multiplier := abs(current / required):
-            with Image.new("RGB", (round(862 * multiplier), 44), color=color) as progress_bar:
-                template.paste(progress_bar, (252, 164), create_rounded_rectangle_mask(progress_bar.size, 10))
 
-        # Level
-        level_bg, level_bg_mask = create_outlined_rounded_rectangle(
-            (192, 60), 20, 4, (57, 62, 70), get_color_alpha(color, 0.5)
-        )
-        draw = ImageDraw.Draw(level_bg)
+@lru_cache(maxsize=256)
+def create_label(font: ImageFont.FreeTypeFont, text: str, start: float = 0.0) -> Image.Image:
+    """
+    Pre-rasterizes a text which never changes into a mask that can be pasted in the fill colour.
+    ``start`` is the fractional part of the horizontal coordinate, glyphs are positioned with subpixel precision.
+    """
+    left, top, right, bottom = font.getbbox(text)
+    label = Image.new("L", (right + 1, bottom), 0)
+    ImageDraw.Draw(label).text((start, 0), text, font=font, fill=255)
 
-        text_width = INTER_MEDIUM_32.getlength("Level")
-        number_width = INTER_BOLD_36.getlength(str(level))
+    return label
 
-        offset = int((186 - (text_width + number_width)) / 2)
 
-        draw.text((offset, 16), text="Level", font=INTER_MEDIUM_32, fill=(216, 216, 216))
-        draw.text((offset + text_width + 10, 12), text=str(level), font=INTER_BOLD_36, fill=(235, 235, 235))
+def paste_label(
+    image: Image.Image, xy: tuple[float, float], text: str, font: ImageFont.FreeTypeFont, fill: tuple[int, int, int]
+) -> None:
+    """Pastes a pre-rasterized label, the result is the same as drawing the text at these coordinates."""
+    x, y = xy
+    image.paste(fill, (int(x), int(y)), create_label(font, text, x % 1))
+
 
-        template.paste(level_bg, (38, 254), level_bg_mask)
+@lru_cache(maxsize=128)
+def create_row_layer(color: tuple[int, int, int]) -> tuple[Image.Image, Image.Image]:
+    """Returns the outlined background of a leaderboard row and its mask for an accent colour."""
+    return create_outlined_rounded_rectangle((1068, 84), 20, 4, (57, 62, 70), get_color_alpha(color, 0.5))
 
-        level_bg.close()
-        level_bg_mask.close()
 
-        # Experience
-        experience_bg, experience_bg_mask = create_outlined_rounded_rectangle(
-            (260, 60), 20, 4, (57, 62, 70), get_color_alpha(color, 0.5)
-        )
-        draw = ImageDraw.Draw(experience_bg)
+@lru_cache(maxsize=8)
+def get_avatar_mask(size: int) -> Image.Image:
+    return load_mask().resize((size, size), Image.LANCZOS)
 
-        draw = ImageDraw.Draw(experience_bg)
-        text = f"{shorten_number(current)} XP / {shorten_number(required)}"
 
-        font, y = EXPERIENCE[False]
-        if (text_size := font.getlength(text)) > 190:
-            font, y = EXPERIENCE[True]
-            text_size = font.getlength(text)
+@lru_cache(maxsize=1)
+def get_progress_bar_cap() -> Image.Image:
+    mask = create_rounded_rectangle_mask(PROGRESS_BAR_SIZE, PROGRESS_BAR_RADIUS)
+    return mask.crop((PROGRESS_BAR_SIZE[0] - PROGRESS_BAR_CAP, 0, *PROGRESS_BAR_SIZE))
 
-        offset = int((212 - text_size) / 2)
 
-        experience_bg.paste(STAR, (offset, 14), STAR)
-        draw.text((offset + 48, y), text=text, font=font, fill=(235, 235, 235))
+def paste_progress_bar(image: Image.Image, position: tuple[int, int], width: int, color: tuple[int, int, int]) -> None:
+    """
+    Pastes a progress bar of a certain width. Its mask is cut from the cached full width one
+    instead of being built for every width, which would thrash the cache of rounded masks.
+    """
+    x, y = position
+    height = PROGRESS_BAR_SIZE[1]
+    body = width - PROGRESS_BAR_CAP
+
+    with create_rounded_rectangle_mask(PROGRESS_BAR_SIZE, PROGRESS_BAR_RADIUS).crop((0, 0, body, height)) as mask:
+        image.paste(color, (x, y, x + body, y + height), mask)
+
+    image.paste(color, (x + body, y, x + width, y + height), get_progress_bar_cap())
+
+
+def cache_stats() -> dict[str, dict[str, int | float]]:
+    """Returns the hit rates of the caches used while rendering."""
+    stats = {}
+
+    caches = (
+        ("masks", create_rounded_rectangle_mask),
+        ("layers", create_base_layer),
+        ("rows", create_row_layer),
+        ("avatar_masks", get_avatar_mask),
+        ("text", get_text_length),
+        ("labels", create_label),
+    )
+
+    for name, function in caches:
+        info = function.cache_info()
+        lookups = info.hits + info.misses
+        stats[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "hit_rate": info.hits / lookups if lookups else 0.0,
+        }
+
+    return stats
+
+
+def preload() -> None:
+    """Loads the assets and warms the caches of the masks which don't depend on the accent colour."""
+    for weight, size in FONTS:
+        load_font(weight, size)
+
+    for name in IMAGES:
+        load_image(name)
 
-        template.paste(experience_bg, (252, 254), experience_bg_mask)
+    load_mask()
+    get_progress_bar_cap()
 
-        experience_bg.close()
-        experience_bg_mask.close()
+    for size, radius, thickness in (((192, 192), 44, 4), ((862, 44), 10, 4), ((192, 60), 20, 4), ((260, 60), 20, 4)):
+        create_rounded_rectangle_mask(size, radius)
+        create_rounded_rectangle_mask((size[0] + thickness, size[1] + thickness), radius + (thickness // 2))
+
+    create_rounded_rectangle_mask((268, 60), 20)
+    create_rounded_rectangle_mask((272, 64), 22)
+
+    create_label(load_font("Medium", 32), "Level")
+
+
+def compose(
+    avatar: bytes,
+    color: tuple[int, int, int],
+    name: str,
+    tag: str,
+    level: int,
+    current: int,
+    required: int,
+    rank: int,
+    members: int,
+    messages: int,
+) -> Image.Image:
+    """
+    Composes a rank card. The avatar is passed as the raw RGBA pixels of a 184x184 image
+    along with its dominant colour.
+    """
+    # User Avatar
+    with Image.frombytes("RGBA", (184, 184), avatar) as image:
+        color = quantize_color(color)
+        mask = ImageChops.darker(load_mask(), image.split()[-1])
+
+        template = create_base_layer(color).copy()
+        template.paste(image, (44, 44), mask)
+        mask.close()
+
+    draw = ImageDraw.Draw(template)
+
+    # User Name
+    draw.text((252, 62), name, font=load_font("Bold", 48), fill=(235, 235, 235))
+    draw.text((252, 114), tag, font=load_font("Medium", 28), fill=get_color_alpha((216, 216, 216), 0.8))
+
+    # Rank
+    rank_text = f"Rank #{rank}"
+    width = get_text_length(load_font("Bold", 48), rank_text)
+    draw.text((1114 - width, 62), text=rank_text, font=load_font("Bold", 48), fill=(235, 235, 235))
+
+    members_text = f"Out Of {shorten_number(members)}"
+    width = get_text_length(load_font("Medium", 28), members_text)
+    draw.text(
+        (1114 - width, 114),
+        members_text,
+        font=load_font("Medium", 28),
+        fill=get_color_alpha((216, 216, 216), 0.8),
+    )
+
+    # Progress Bar
+    if multiplier := abs(current / required):
+        # The bar can't be narrower than its rounded corners nor wider than its track.
+        width = min(max(round(PROGRESS_BAR_SIZE[0] * multiplier), 20), PROGRESS_BAR_SIZE[0])
+        paste_progress_bar(template, (252, 164), width, color)
+
+    # Level
+    text_width = get_text_length(load_font("Medium", 32), "Level")
+    number_width = get_text_length(load_font("Bold", 36), str(level))
+
+    offset = 38 + int((186 - (text_width + number_width)) / 2)
+
+    paste_label(template, (offset, 254 + 16), "Level", load_font("Medium", 32), (216, 216, 216))
+    draw.text((offset + text_width + 10, 254 + 12), text=str(level), font=load_font("Bold", 36), fill=(235, 235, 235))
+
+    # Experience
+    text = f"{shorten_number(current)} XP / {shorten_number(required)}"
+
+    size, y = EXPERIENCE[False]
+    font = load_font("Bold", size)
+
+    if (text_size := get_text_length(font, text)) > 190:
+        size, y = EXPERIENCE[True]
+        font = load_font("Bold", size)
+        text_size = get_text_length(font, text)
+
+    offset = 252 + int((212 - text_size) / 2)
+
+    star = load_image("star")
+    template.paste(star, (offset, 254 + 14), star)
+    draw.text((offset + 48, 254 + y), text=text, font=font, fill=(235, 235, 235))
+
+    # Messages
+    msg_count = shorten_number(messages)
+
+    count_font, text_font, count_offset, text_offset = load_font("Bold", 28), load_font("Medium", 24), 14, 18
+    if (text_size := (get_text_length(count_font, msg_count) + 8 + get_text_length(text_font, "Messages"))) > 200:
+        cfont, tfont, count_offset, text_offset = load_font("Bold", 22), load_font("Medium", 20), 18, 20
+        text_size = get_text_length(cfont, msg_count) + 8 + get_text_length(tfont, "Messages")
+
+    offset = 846 + int((220 - text_size) / 2)
+
+    bubble = load_image("bubble")
+    template.paste(bubble, (offset, 256 + 14), bubble)
+    draw.text((offset + 48, 256 + count_offset), text=msg_count, font=count_font, fill=(235, 235, 235))
+    paste_label(
+        template,
+        (offset + 56 + get_text_length(count_font, msg_count), 256 + text_offset),
+        "Messages",
+        text_font,
+        (216, 216, 216),
+    )
+
+    return template
 
-        # Messages
-        messages_bg, messages_bg_mask = create_outlined_rounded_rectangle(
-            (268, 60), 20, 4, (57, 62, 70), get_color_alpha(color, 0.5)
-        )
-        draw = ImageDraw.Draw(messages_bg)
-        msg_count = shorten_number(messages)
 
-        count_font, text_font, count_offset, text_offset = INTER_BOLD_28, INTER_MEDIUM_24, 14, 18
-        if (text_size := (count_font.getlength(msg_count) + 8 + text_font.getlength("Messages"))) > 200:
-            cfont, tfont, count_offset, text_offset = INTER_BOLD_22, INTER_MEDIUM_20, 18, 20
-            text_size = cfont.getlength(msg_count) + 8 + tfont.getlength("Messages")
-
-        offset = int((220 - text_size) / 2)
-
-        messages_bg.paste(BUBBLE, (offset, 14), BUBBLE)
-        draw.text((offset + 48, count_offset), text=msg_count, font=count_font, fill=(235, 235, 235))
-        draw.text(
-            (offset + 56 + count_font.getlength(msg_count), text_offset),
-            text="Messages",
-            font=text_font,
-            fill=(216, 216, 216),
-        )
-
-        template.paste(messages_bg, (846, 256), messages_bg_mask)
-
-        messages_bg.close()
-        messages_bg_mask.close()
-
-    buffer = BytesIO()
-    template.save(buffer, "png")
-    buffer.seek(0)
+def render(
+    avatar: bytes,
+    color: tuple[int, int, int],
+    name: str,
+    tag: str,
+    level: int,
+    current: int,
+    required: int,
+    rank: int,
+    members: int,
+    messages: int,
+    encoder: Encoder = Encoder(),
+) -> bytes:
+    """Renders and encodes a rank card, takes only plain data so it can run in a worker process."""
+    with compose(avatar, color, name, tag, level, current, required, rank, members, messages) as card:
+        return encoder.encode(card)
+
+
+def compose_leaderboard(rows: list[tuple[bytes | None, tuple[int, int, int], str, int, int, int]]) -> Image.Image:
+    """
+    Composes a leaderboard with a row for each member. Every row is a tuple of the raw RGBA
+    pixels of their 184x184 avatar or ``None`` if unavailable, its dominant colour, their name,
+    rank, level and total experience.
+    """
+    template = Image.new("RGB", (1152, 40 + len(rows) * 104), (34, 40, 49))
+    draw = ImageDraw.Draw(template)
+
+    for index, (avatar, color, name, rank, level, experience) in enumerate(rows):
+        color = quantize_color(color)
+        top = 40 + index * 104
+
+        row, row_mask = create_row_layer(color)
+        template.paste(row, (40, top), row_mask)
 
-    return discord.File(buffer, filename="rank.png")
+        # Rank
+        rank_text = f"#{rank}"
+        rank_x = 104 - get_text_length(load_font("Bold", 36), rank_text) / 2
+        draw.text((rank_x, top + 22), rank_text, font=load_font("Bold", 36), fill=(235, 235, 235))
+
+        # Avatar
+        if avatar is not None:
+            with Image.frombytes("RGBA", (184, 184), avatar).resize((64, 64), Image.BOX) as image:
+                mask = ImageChops.darker(get_avatar_mask(64), image.split()[-1])
+                template.paste(image, (160, top + 12), mask)
+                mask.close()
+
+        # Level & Experience
+        experience_text = f"{shorten_number(experience)} XP"
+        experience_width = get_text_length(load_font("Medium", 24), experience_text)
+        draw.text((1080 - experience_width, top + 30), experience_text, font=load_font("Medium", 24), fill=(216, 216, 216))
+
+        level_text = f"Level {level}"
+        level_x = 1080 - experience_width - 32 - get_text_length(load_font("Bold", 28), level_text)
+        draw.text((level_x, top + 26), level_text, font=load_font("Bold", 28), fill=(235, 235, 235))
+
+        # Name
+        while len(name) > 1 and load_font("Bold", 28).getlength(name) > level_x - 276:
+            name = name[:-2] + "\N{HORIZONTAL ELLIPSIS}"
+        draw.text((244, top + 24), name, font=load_font("Bold", 28), fill=(235, 235, 235))
+
+    return template
+
+
+def render_leaderboard(
+    rows: list[tuple[bytes | None, tuple[int, int, int], str, int, int, int]], encoder: Encoder = Encoder()
+) -> bytes:
+    """Renders and encodes a leaderboard in a single job, takes only plain data so it can run in a worker process."""
+    with compose_leaderboard(rows) as card:
+        return encoder.encode(card)
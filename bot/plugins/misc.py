@@ -64,12 +64,18 @@ class Miscellaneous(Plugin):
         )
 
         if isinstance(user, discord.Member):
+            assert interaction.guild is not None
+
             embed.add_field(
                 name="Server Member Since", value="\n".join(discord.utils.format_dt(user.joined_at, style=f) for f in ["D", "R"])  # type: ignore
             )
 
-            sorted_members = sorted(interaction.guild.members, key=lambda member: member.joined_at or discord.utils.utcnow())
-            embed.add_field(name="Join Position", value=f"{sorted_members.index(user) + 1}/{len(sorted_members)}")
+            if not interaction.guild.chunked:
+                await interaction.response.defer(ephemeral=ephemeral)
+                await self.bot.hydrate(interaction.guild)
+
+            join_index = self.bot.join_positions.get(interaction.guild)
+            embed.add_field(name="Join Position", value=f"{join_index.position(user)}/{len(join_index)}")
 
             embed.add_field(
                 name=f"Roles [{len(user.roles)}]:",
@@ -112,12 +118,15 @@ class Miscellaneous(Plugin):
                 )
             )
 
-        await interaction.response.send_message(embed=embed, view=view, ephemeral=ephemeral)
+        send = interaction.followup.send if interaction.response.is_done() else interaction.response.send_message
+        await send(embed=embed, view=view, ephemeral=ephemeral)
 
     @info.command()
     @app.describe(ephemeral="Setting this to True makes it so that only you can see it. Default is False.")
     async def server(self, interaction: discord.Interaction, ephemeral: bool = False) -> None:
         """Obtain information about this server."""
+        assert interaction.guild is not None
+
         embed = discord.Embed(title=interaction.guild.name, color=discord.Color.blurple())
         embed.set_thumbnail(url=getattr(interaction.guild.icon, "url", None))
 
@@ -128,30 +137,22 @@ class Miscellaneous(Plugin):
             value="\n".join(discord.utils.format_dt(interaction.guild.created_at, style=f) for f in ["D", "R"]),  # type: ignore
         )
 
+        if not interaction.guild.chunked:
+            await interaction.response.defer(ephemeral=ephemeral)
+            await self.bot.hydrate(interaction.guild)
+
+        stats = self.bot.stats.get(interaction.guild)
+
         assert interaction.guild.member_count is not None
-        bots = sum(member.bot for member in interaction.guild.members)
         embed.add_field(
             name="Members",
             value=f"{interaction.guild.member_count} Total\n"
-            f"{Plural(interaction.guild.member_count - bots):Human} | "
-            f"{Plural(bots):Bot}\n",
+            f"{Plural(interaction.guild.member_count - stats.bots):Human} | "
+            f"{Plural(stats.bots):Bot}\n",
         )
 
-        text_channels = [0, 0]
-        voice_channels = [0, 0]
-
-        for channel in interaction.guild.channels:
-            allowed, denied = channel.overwrites_for(interaction.guild.default_role).pair()
-            permissions = discord.Permissions(
-                (interaction.guild.default_role.permissions.value & ~denied.value) | allowed.value
-            )
-
-            if isinstance(channel, discord.TextChannel):
-                text_channels[0] += 1
-                text_channels[1] += 1 if not permissions.read_messages else 0
-            elif isinstance(channel, (discord.VoiceChannel, discord.StageChannel)):
-                voice_channels[0] += 1
-                voice_channels[1] += 1 if not permissions.connect else 0
+        text_channels = stats.text_channels
+        voice_channels = stats.voice_channels
 
         embed.add_field(
             name="Channels",
@@ -168,13 +169,16 @@ class Miscellaneous(Plugin):
             f"Verification: {str(interaction.guild.verification_level).title()}",
         )
 
-        last_boost = max(interaction.guild.members, key=lambda member: member.premium_since or interaction.guild.created_at)
+        last_boost = None
+        if (latest_booster := stats.latest_booster) is not None:
+            last_boost = await self.bot.get_or_fetch_member(interaction.guild, latest_booster[0])
+
         embed.add_field(
             name="Boosts",
             value=f"Level {interaction.guild.premium_tier} ({interaction.guild.premium_subscription_count} Boosts)"
             + (
                 f"Last Boost: {last_boost} ({discord.utils.format_dt(last_boost.premium_since, style='R')})"
-                if last_boost.premium_since is not None
+                if last_boost is not None and last_boost.premium_since is not None
                 else ""
             ),
         )
@@ -190,7 +194,8 @@ class Miscellaneous(Plugin):
 
         embed.set_footer(text=f"ID: {interaction.guild.id}")
 
-        await interaction.response.send_message(embed=embed, ephemeral=ephemeral)
+        send = interaction.followup.send if interaction.response.is_done() else interaction.response.send_message
+        await send(embed=embed, ephemeral=ephemeral)
 
     @info.command()
     @app.describe(role="The role you want information about. Defaults to your top role if nothing is provided.")
@@ -0,0 +1,156 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from typing import TYPE_CHECKING, cast
+
+import discord
+from discord.ext import commands
+
+from bot import Manager, Plugin, Plural, Winston, estimate_member_size
+
+if TYPE_CHECKING:
+    from bot.plugins.leveling import Leveling
+
+
+class Owner(Plugin):
+    @commands.command()
+    @commands.is_owner()
+    async def members(self, ctx: commands.Context) -> None:
+        """Shows how many members are cached and roughly how much memory they take per guild."""
+        guilds = sorted(self.bot.guilds, key=lambda guild: len(guild.members), reverse=True)
+        sizes = {guild.id: estimate_member_size(guild.members) for guild in guilds}
+
+        lines = [
+            f"**{guild.name}** `{guild.id}`\n"
+            f"{len(guild.members):,}/{guild.member_count or 0:,} Cached | ~{sizes[guild.id] / 1048576:.2f} MB | "
+            f"{self.bot.hydration_status(guild).title()}"
+            for guild in guilds[:15]
+        ]
+
+        policy = self.bot.member_cache
+        embed = discord.Embed(title="Member Cache", description="\n".join(lines) or "None", color=discord.Color.blurple())
+        embed.add_field(name="Policy", value=policy.policy.title())
+        embed.add_field(name="Total Cached", value=f"{sum(len(guild.members) for guild in guilds):,}")
+        embed.add_field(name="Estimated Size", value=f"~{sum(sizes.values()) / 1048576:.2f} MB")
+        embed.add_field(name="Dropped", value=f"{Plural(policy.trimmed):Member}")
+
+        embed.set_footer(text=f"Showing the largest {Plural(min(len(guilds), 15)):Guild} of {len(guilds)}")
+
+        await ctx.send(embed=embed)
+
+    @commands.command()
+    @commands.is_owner()
+    async def database(self, ctx: commands.Context) -> None:
+        """Shows the size of the database pool, the statement latencies and the counters of every cache and buffer."""
+        stats = Manager.metrics.stats(getattr(Manager, "pool", None))
+        embed = discord.Embed(title="Database", color=discord.Color.blurple())
+
+        if pool := stats.get("pool"):
+            embed.add_field(
+                name="Pool",
+                value=f"{pool['in_use']}/{pool['size']} In Use\nMin Size: {pool['min_size']} | Max Size: {pool['max_size']}",
+            )
+
+        acquire = stats["acquire"]
+        embed.add_field(
+            name="Acquire",
+            value=f"{Plural(acquire['count']):Acquire}\n"
+            f"Average Wait: {acquire['average_wait'] * 1000:.2f}ms | Max Wait: {acquire['max_wait'] * 1000:.2f}ms",
+        )
+
+        embed.add_field(name="Coalesced", value=f"{Plural(Manager.coalesced):Cache Miss|Cache Misses}")
+
+        if buffer := getattr(Manager, "buffer", None):
+            embed.add_field(
+                name="Buffer",
+                value=f"{buffer.stats['pending']:,} Pending | {buffer.stats['flushed']:,} Flushed\n"
+                f"{Plural(buffer.stats['flushes']):Flush|Flushes} | "
+                f"Average: {buffer.stats['average_flush_latency'] * 1000:.2f}ms",
+            )
+
+        levels = Manager.levels_cache.stats
+        embed.add_field(
+            name="Level Cache",
+            value=f"{levels['size']:,}/{levels['max_size']:,} Cached | {levels['hit_rate']:.1%} Hit Rate\n"
+            f"{Plural(levels['evictions']):Eviction}",
+        )
+
+        rankings = Manager.rankings.stats
+        embed.add_field(
+            name="Rankings",
+            value=f"{Plural(rankings['guilds']):Guild} | {Plural(rankings['members']):Member}\n"
+            f"{rankings['loading']} Loading",
+        )
+
+        leaderboards = Manager.leaderboards.stats
+        embed.add_field(
+            name="Leaderboards",
+            value=f"{Plural(leaderboards['guilds']):Guild}\n"
+            f"{leaderboards['hits']:,} Hits | {leaderboards['misses']:,} Misses",
+        )
+
+        if leveling := cast("Leveling | None", self.bot.get_cog("Leveling")):
+            cooldown = leveling.message_cooldown.stats
+            embed.add_field(
+                name="Cooldowns",
+                value=f"{cooldown['size']:,} Active | {cooldown['expired']:,} Expired\n"
+                f"{Plural(cooldown['sweeps']):Sweep} | Last: {cooldown['last_sweep_duration'] * 1000:.2f}ms",
+            )
+
+            avatars = leveling.avatars.stats
+            embed.add_field(
+                name="Avatars",
+                value=f"{avatars['size']:,} In Memory | {avatars['disk_size']:,} On Disk\n"
+                f"{avatars['hit_rate']:.1%} Hit Rate | {avatars['disk_hits']:,} Disk Hits | "
+                f"{Plural(avatars['fetches']):Fetch|Fetches}",
+            )
+
+            pool = leveling.render_pool.stats
+            embed.add_field(
+                name="Render Pool",
+                value=f"{Plural(pool['workers']):Worker} | {Plural(pool['restarts']):Restart}\n"
+                f"{pool['queued']} Queued | {pool['rejected']:,} Rejected",
+            )
+
+            # Imported here so that the caches of the module loaded with the plugin are read after a reload.
+            from bot.plugins.leveling.render import cache_stats
+
+            embed.add_field(
+                name="Render Caches",
+                value="\n".join(
+                    f"`{name}` {cache['size']:,} Cached | {cache['hit_rate']:.1%} Hit Rate"
+                    for name, cache in cache_stats().items()
+                ),
+                inline=False,
+            )
+
+        embed.add_field(
+            name="Statements",
+            value="\n".join(
+                f"`{name}` {Plural(statement['count']):Run} | "
+                f"Average: {statement['average'] * 1000:.2f}ms | Max: {statement['max'] * 1000:.2f}ms"
+                for name, statement in stats["statements"].items()
+            )
+            or "None",
+            inline=False,
+        )
+
+        await ctx.send(embed=embed)
+
+
+async def setup(bot: Winston) -> None:
+    await bot.add_cog(Owner(bot))
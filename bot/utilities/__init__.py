@@ -16,3 +16,7 @@ You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 from .formatting import Plural, shorten_number
+from .joins import JoinIndex, JoinIndexRegistry
+from .loading import PluginTimer
+from .members import MemberCachePolicy, estimate_member_size
+from .stats import GuildStats, GuildStatsRegistry, is_locked
@@ -0,0 +1,114 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import bisect
+import math
+
+import discord
+
+
+def _join_key(member: discord.Member) -> tuple[float, int]:
+    # Members without a join date are sorted last
+    return (member.joined_at.timestamp() if member.joined_at is not None else math.inf, member.id)
+
+
+class JoinIndex:
+    """
+    Represents the members of a guild sorted by when they joined, so the join position of a
+    member is a binary search rather than sorting every member.
+
+    Parameters
+    ----------
+    guild: :class:`discord.Guild`
+        The guild to build the index from.
+    """
+
+    __slots__ = ("keys", "members")
+
+    def __init__(self, guild: discord.Guild) -> None:
+        self.keys: list[tuple[float, int]] = sorted(_join_key(member) for member in guild.members)
+
+        # Member ID -> key, members dropped from the cache have no join date left to search by
+        self.members: dict[int, tuple[float, int]] = {key[1]: key for key in self.keys}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def position(self, member: discord.Member) -> int:
+        """Returns the 1-indexed join position of a member."""
+        return bisect.bisect_left(self.keys, _join_key(member)) + 1
+
+    def add(self, member: discord.Member) -> None:
+        key = _join_key(member)
+
+        if (previous := self.members.get(member.id)) == key:
+            return
+
+        # Rejoined without leaving as far as the index knows, e.g. the leave was missed while disconnected
+        if previous is not None:
+            self.remove(member)
+
+        bisect.insort(self.keys, key)
+        self.members[member.id] = key
+
+    def remove(self, member: discord.Member | discord.User) -> None:
+        if (key := self.members.pop(member.id, None)) is None:
+            return
+
+        index = bisect.bisect_left(self.keys, key)
+
+        if index < len(self.keys) and self.keys[index] == key:
+            del self.keys[index]
+
+
+class JoinIndexRegistry:
+    """
+    Keeps the :class:`JoinIndex` of every guild which has been asked for. Indexes are built lazily
+    on first use unless built up front with :meth:`build`, events for guilds without one are ignored.
+    """
+
+    def __init__(self) -> None:
+        self.guilds: dict[int, JoinIndex] = {}
+
+    def __len__(self) -> int:
+        return len(self.guilds)
+
+    def get(self, guild: discord.Guild) -> JoinIndex:
+        if (index := self.guilds.get(guild.id)) is None:
+            index = self.build(guild)
+
+        return index
+
+    def build(self, guild: discord.Guild) -> JoinIndex:
+        index = self.guilds[guild.id] = JoinIndex(guild)
+        return index
+
+    def discard(self, guild_id: int) -> None:
+        self.guilds.pop(guild_id, None)
+
+    def clear(self) -> None:
+        self.guilds.clear()
+
+    def on_member_join(self, member: discord.Member) -> None:
+        if (index := self.guilds.get(member.guild.id)) is not None:
+            index.add(member)
+
+    def on_member_remove(self, member: discord.Member | discord.User, guild_id: int) -> None:
+        if (index := self.guilds.get(guild_id)) is not None:
+            index.remove(member)
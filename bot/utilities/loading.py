@@ -0,0 +1,118 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import importlib.abc
+import importlib.machinery
+import sys
+import time
+from types import ModuleType
+from typing import Any, Awaitable, Callable, Iterable, Sequence
+
+
+class _TimedLoader(importlib.abc.Loader):
+    def __init__(self, loader: importlib.abc.Loader, name: str, timer: PluginTimer) -> None:
+        self.loader = loader
+        self.name = name
+        self.timer = timer
+
+    def __getattr__(self, name: str) -> Any:
+        # Everything else, e.g. get_source for tracebacks, is answered by the wrapped loader
+        return getattr(self.loader, name)
+
+    def create_module(self, spec: importlib.machinery.ModuleSpec) -> ModuleType | None:
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module: ModuleType) -> None:
+        start = time.perf_counter()
+
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.timer.imports[self.name] = time.perf_counter() - start
+            self.timer.imported(self.name)
+
+        if (setup := getattr(module, "setup", None)) is not None:
+            module.setup = self.timer._wrap_setup(self.name, setup)
+
+
+class PluginTimer(importlib.abc.MetaPathFinder):
+    """
+    Times how long plugins loaded concurrently take to import and to set up. Their setups only start
+    once every plugin is imported, so that the imports, which block the event loop, aren't counted
+    towards the setups which were waiting meanwhile. Used as a context manager, the timer is only
+    installed in :data:`sys.meta_path` within it.
+
+    Parameters
+    ----------
+    names: Iterable[:class:`str`]
+        The full module names of the plugins.
+    """
+
+    def __init__(self, names: Iterable[str]) -> None:
+        self.names = set(names)
+
+        # Plugin -> duration
+        self.imports: dict[str, float] = {}
+        self.setups: dict[str, float] = {}
+
+        self._importing = set(self.names)
+        self._imported = asyncio.Event()
+
+    def __enter__(self) -> PluginTimer:
+        sys.meta_path.insert(0, self)
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        sys.meta_path.remove(self)
+        self._imported.set()
+
+    def find_spec(
+        self, fullname: str, path: Sequence[str] | None, target: ModuleType | None = None
+    ) -> importlib.machinery.ModuleSpec | None:
+        if fullname not in self.names:
+            return None
+
+        spec = importlib.machinery.PathFinder.find_spec(fullname, path, target)
+
+        if spec is not None and spec.loader is not None:
+            spec.loader = _TimedLoader(spec.loader, fullname, self)
+
+        return spec
+
+    def imported(self, name: str) -> None:
+        """Marks a plugin as imported, also used for plugins which failed before or weren't imported through the timer."""
+        self._importing.discard(name)
+
+        if not self._importing:
+            self._imported.set()
+
+    def _wrap_setup(self, name: str, setup: Callable[[Any], Awaitable[None]]) -> Callable[[Any], Awaitable[None]]:
+        @functools.wraps(setup)
+        async def wrapper(bot: Any) -> None:
+            await self._imported.wait()
+
+            start = time.perf_counter()
+            try:
+                await setup(bot)
+            finally:
+                self.setups[name] = time.perf_counter() - start
+
+        return wrapper
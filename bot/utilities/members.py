@@ -0,0 +1,132 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import sys
+import time
+from typing import Iterable, Sequence
+
+import discord
+
+
+class MemberCachePolicy:
+    """
+    Decides which members stay cached once their guild's full member list has been used.
+
+    Members in a voice channel, boosters, the owner and the bot itself are always kept since
+    events about them depend on being cached. Other members which are not retained are dropped
+    by :meth:`trim` and have to be fetched by whatever needs them.
+
+    Parameters
+    ----------
+    policy: :class:`str`, default="full"
+        ``"full"`` keeps every member, ``"active"`` keeps members who sent a message within the
+        last ``active_hours`` and ``"roles"`` keeps members with any of ``roles``.
+    active_hours: :class:`float`, default=24
+        How long members stay cached after their last message with the ``"active"`` policy.
+    roles: list[:class:`int`], default=[]
+        The IDs of the roles whose members are kept with the ``"roles"`` policy.
+    """
+
+    POLICIES = ("full", "active", "roles")
+
+    def __init__(self, *, policy: str = "full", active_hours: float = 24, roles: Iterable[int] = ()) -> None:
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown member cache policy '{policy}', expected one of {', '.join(self.POLICIES)}")
+
+        self.policy = policy
+        self.active_for = active_hours * 3600
+        self.roles = frozenset(roles)
+
+        # (guild_id << 64) | member_id -> time of their last message
+        self.last_active: dict[int, float] = {}
+
+        self.trimmed = 0
+
+    @property
+    def enabled(self) -> bool:
+        """:class:`bool` Whether any members are dropped from the cache."""
+        return self.policy != "full"
+
+    def touch(self, member: discord.Member) -> None:
+        """Records the activity of a member, caching them again if they were dropped."""
+        if self.policy != "active":
+            return
+
+        self.last_active[(member.guild.id << 64) | member.id] = time.monotonic()
+
+        if member.guild.get_member(member.id) is None:
+            member.guild._add_member(member)
+
+    def should_keep(self, member: discord.Member, now: float | None = None) -> bool:
+        if member.voice is not None or member.premium_since is not None:
+            return True
+
+        if self.policy == "active":
+            now = time.monotonic() if now is None else now
+            return self.last_active.get((member.guild.id << 64) | member.id, -self.active_for) + self.active_for > now
+        if self.policy == "roles":
+            return any(member.get_role(role_id) is not None for role_id in self.roles)
+
+        return True
+
+    def trim(self, guild: discord.Guild) -> int:
+        """Drops the members of a guild which shouldn't stay cached, returns how many were dropped."""
+        if not self.enabled:
+            return 0
+
+        now = time.monotonic()
+        always = {guild.owner_id, guild.me.id}
+
+        dropped = [member for member in guild.members if member.id not in always and not self.should_keep(member, now)]
+
+        for member in dropped:
+            # There's no public API to evict a member, this is what discord.py does on member remove.
+            guild._remove_member(member)
+
+        self.trimmed += len(dropped)
+        return len(dropped)
+
+    def expire(self) -> None:
+        """Forgets the activity of members which are no longer considered active."""
+        cutoff = time.monotonic() - self.active_for
+        self.last_active = {key: last for key, last in self.last_active.items() if last > cutoff}
+
+
+# Attributes of a member which point to objects shared with other members
+SHARED_ATTRIBUTES = ("guild", "_user", "_state")
+
+
+def estimate_member_size(members: Sequence[discord.Member], samples: int = 32) -> int:
+    """
+    Estimates the bytes taken by cached members from a sample of them. Only the member objects and
+    their own attributes are counted, users are shared between guilds and aren't included.
+    """
+    if not members:
+        return 0
+
+    sample = members[:: max(len(members) // samples, 1)][:samples]
+    total = 0
+
+    for member in sample:
+        total += sys.getsizeof(member)
+        for name in member.__slots__:
+            if name not in SHARED_ATTRIBUTES:
+                total += sys.getsizeof(getattr(member, name, None))
+
+    return total * len(members) // len(sample)
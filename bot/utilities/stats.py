@@ -0,0 +1,193 @@
+"""
+Winston: Utilities & Moderation Tools for Discord
+Copyright (C) 2023 MrArkon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import datetime
+
+import discord
+
+
+def is_locked(channel: discord.abc.GuildChannel) -> bool:
+    """Whether the default role can't view a text channel or connect to a voice channel."""
+    default_role = channel.guild.default_role
+
+    allowed, denied = channel.overwrites_for(default_role).pair()
+    permissions = discord.Permissions((default_role.permissions.value & ~denied.value) | allowed.value)
+
+    if isinstance(channel, (discord.VoiceChannel, discord.StageChannel)):
+        return not permissions.connect
+
+    return not permissions.read_messages
+
+
+class GuildStats:
+    """
+    Represents the member and channel statistics of a guild. These are built once from the
+    cache and then kept up to date by gateway events, so reading them doesn't walk the members.
+
+    Parameters
+    ----------
+    guild: :class:`discord.Guild`
+        The guild to build the statistics from.
+    """
+
+    __slots__ = ("humans", "bots", "boosters", "_latest_booster", "channels", "_channel_counts")
+
+    def __init__(self, guild: discord.Guild) -> None:
+        self.humans = 0
+        self.bots = 0
+        self.boosters: dict[int, datetime.datetime] = {}
+        self._latest_booster: int | None = None
+
+        # Channel ID -> (is text channel, is locked) of every text and voice channel
+        self.channels: dict[int, tuple[bool, bool]] = {}
+        # (is text channel) -> [total, locked]
+        self._channel_counts = {True: [0, 0], False: [0, 0]}
+
+        for member in guild.members:
+            self.add_member(member)
+
+        for channel in guild.channels:
+            self.update_channel(channel)
+
+    @property
+    def latest_booster(self) -> tuple[int, datetime.datetime] | None:
+        """:class:`tuple` | ``None`` The ID of the member who boosted most recently and when they did."""
+        if self._latest_booster is None and self.boosters:
+            self._latest_booster = max(self.boosters, key=self.boosters.__getitem__)
+
+        if self._latest_booster is None:
+            return None
+
+        return self._latest_booster, self.boosters[self._latest_booster]
+
+    @property
+    def text_channels(self) -> tuple[int, int]:
+        """:class:`tuple` The total and locked count of the text channels."""
+        total, locked = self._channel_counts[True]
+        return total, locked
+
+    @property
+    def voice_channels(self) -> tuple[int, int]:
+        """:class:`tuple` The total and locked count of the voice and stage channels."""
+        total, locked = self._channel_counts[False]
+        return total, locked
+
+    def add_member(self, member: discord.Member) -> None:
+        if member.bot:
+            self.bots += 1
+        else:
+            self.humans += 1
+
+        self.update_booster(member)
+
+    def remove_member(self, member: discord.Member | discord.User) -> None:
+        if member.bot:
+            self.bots -= 1
+        else:
+            self.humans -= 1
+
+        self._remove_booster(member.id)
+
+    def update_booster(self, member: discord.Member) -> None:
+        if member.premium_since is None:
+            self._remove_booster(member.id)
+        else:
+            self.boosters[member.id] = member.premium_since
+
+            if self._latest_booster is not None and member.premium_since > self.boosters[self._latest_booster]:
+                self._latest_booster = member.id
+
+    def _remove_booster(self, member_id: int) -> None:
+        if self.boosters.pop(member_id, None) is not None and member_id == self._latest_booster:
+            # Recomputed lazily from the remaining boosters
+            self._latest_booster = None
+
+    def update_channel(self, channel: discord.abc.GuildChannel) -> None:
+        if isinstance(channel, discord.TextChannel):
+            self._set_channel(channel.id, (True, is_locked(channel)))
+        elif isinstance(channel, (discord.VoiceChannel, discord.StageChannel)):
+            self._set_channel(channel.id, (False, is_locked(channel)))
+
+    def remove_channel(self, channel: discord.abc.GuildChannel) -> None:
+        self._set_channel(channel.id, None)
+
+    def _set_channel(self, channel_id: int, state: tuple[bool, bool] | None) -> None:
+        if (previous := self.channels.pop(channel_id, None)) is not None:
+            counts = self._channel_counts[previous[0]]
+            counts[0] -= 1
+            counts[1] -= previous[1]
+
+        if state is not None:
+            self.channels[channel_id] = state
+
+            counts = self._channel_counts[state[0]]
+            counts[0] += 1
+            counts[1] += state[1]
+
+
+class GuildStatsRegistry:
+    """
+    Keeps the :class:`GuildStats` of every guild which has been asked for. Statistics are built
+    lazily on first use, events for guilds which haven't been built yet are ignored.
+    """
+
+    def __init__(self) -> None:
+        self.guilds: dict[int, GuildStats] = {}
+
+    def __len__(self) -> int:
+        return len(self.guilds)
+
+    def get(self, guild: discord.Guild) -> GuildStats:
+        if (stats := self.guilds.get(guild.id)) is None:
+            stats = self.guilds[guild.id] = GuildStats(guild)
+
+        return stats
+
+    def discard(self, guild_id: int) -> None:
+        self.guilds.pop(guild_id, None)
+
+    def clear(self) -> None:
+        self.guilds.clear()
+
+    def on_member_join(self, member: discord.Member) -> None:
+        if (stats := self.guilds.get(member.guild.id)) is not None:
+            stats.add_member(member)
+
+    def on_member_remove(self, member: discord.Member | discord.User, guild_id: int) -> None:
+        if (stats := self.guilds.get(guild_id)) is not None:
+            stats.remove_member(member)
+
+    def on_member_update(self, before: discord.Member, after: discord.Member) -> None:
+        if before.premium_since != after.premium_since and (stats := self.guilds.get(after.guild.id)) is not None:
+            stats.update_booster(after)
+
+    def on_guild_channel_update(self, channel: discord.abc.GuildChannel) -> None:
+        if (stats := self.guilds.get(channel.guild.id)) is not None:
+            stats.update_channel(channel)
+
+    def on_guild_channel_delete(self, channel: discord.abc.GuildChannel) -> None:
+        if (stats := self.guilds.get(channel.guild.id)) is not None:
+            stats.remove_channel(channel)
+
+    def on_guild_role_update(self, before: discord.Role, after: discord.Role) -> None:
+        # Whether a channel is locked depends on the permissions of the default role
+        if after.is_default() and before.permissions != after.permissions:
+            if (stats := self.guilds.get(after.guild.id)) is not None:
+                for channel in after.guild.channels:
+                    stats.update_channel(channel)
@@ -99,12 +99,16 @@ class Paginator(discord.ui.View):
         self.last_page.disabled = self.next_page.disabled = (page_number + 1) >= self.max_pages
 
     async def _show_page(self, interaction: discord.Interaction) -> None:
-        entries = self.pages[self._current_page]
+        entries = await self.get_page(self._current_page)
         embed = await self.format_page(entries=entries)
         self._update_labels(self._current_page)
 
         await interaction.response.edit_message(embed=embed, view=self)
 
+    async def get_page(self, page_number: int) -> list:
+        """Returns the entries of a page. Can be overridden to fetch pages lazily."""
+        return self.pages[page_number]
+
     async def format_page(self, entries: list) -> discord.Embed:
         raise NotImplementedError
 
@@ -143,7 +147,7 @@ class Paginator(discord.ui.View):
     async def start(cls: Type[Paginator], interaction: discord.Interaction, entries: list, per_page: int) -> Paginator:
         paginator = cls(interaction=interaction, entries=entries, per_page=per_page)
 
-        entries = paginator.pages[0]
+        entries = await paginator.get_page(0)
         embed = await paginator.format_page(entries=entries)
         paginator._update_labels(0)
 